@@ -2,6 +2,12 @@ import pandas as pd
 import random
 import math
 
+# Level -> floor matching through the floor registry of the repository's stacking package
+try:
+    from stacking.floors import floor_registry, match_level
+except ImportError:
+    raise ImportError("DR.py needs the stacking package (pip install -e <repository root>, see README.md)")
+
 # ----------------------------------------
 # Step 1: Load Input Sheets & Normalize
 # ----------------------------------------
@@ -113,15 +119,12 @@ def run_stack_plan(mode):
     assignments = initialize_floor_assignments(all_floor_data)
     unassigned_blocks = []
 
-    # helper to map short names
-    import re
-    def clean_floor_name(f): return re.sub(r'^L\d{3}', '', f).strip()
-    floor_name_map = {clean_floor_name(r['Name']): r['Name'].strip() for _,r in all_floor_data.iterrows()}
+    # Level -> floor: exact name, name without the 'L001' prefix or level code
+    registry = floor_registry(all_floor_data['Name'])
 
     # 4.1 Assign immovable blocks by level
     for _, blk in immovable_blocks.iterrows():
-        raw = str(blk['Level']).strip()
-        fl = floor_name_map.get(raw)
+        fl = match_level(registry, blk['Level'])
         if fl and assignments[fl]['remaining_area']>=blk['Cumulative_Block_Circulation_Area_(SQM)']:
             assignments[fl]['assigned_blocks'].append(blk.to_dict())
             assignments[fl]['assigned_departments'].add(blk['Department_Sub-Department'])
@@ -195,18 +198,16 @@ def run_stack_plan(mode):
                       Assgn_Area_SQM=('Assigned_Area_SQM','sum'))
                  .reset_index())
 
-    space_rows=[]
+    # one crosstab instead of a boolean scan per floor x category
     cats=['ME','WE','US','Support','Speciality']
-    totals={c:len(detailed_df[detailed_df['SpaceMix']==c]) for c in cats}
-    for fl in floors:
-        df_fl=detailed_df[detailed_df['Floor']==fl]
-        for c in cats:
-            cnt=len(df_fl[df_fl['SpaceMix']==c]); tot=totals[c] or 1
-            pct_fl=cnt/len(df_fl)*100 if len(df_fl) else 0
-            pct_ov=cnt/tot*100
-            space_rows.append({'Floor':fl,'SpaceMix':c,'Unit_Count_on_Floor':cnt,
-                               'Pct_of_Floor_UC':round(pct_fl,2),'Pct_of_Overall_UC':round(pct_ov,2)})
-    space_df=pd.DataFrame(space_rows)
+    counts=pd.crosstab(detailed_df['Floor'],detailed_df['SpaceMix']).reindex(index=floors,columns=cats,fill_value=0)
+    fl_tot=detailed_df['Floor'].value_counts().reindex(floors,fill_value=0); cat_tot=counts.sum(axis=0).replace(0,1)
+    space_df=pd.DataFrame({
+        'Unit_Count_on_Floor':counts.stack(),
+        'Pct_of_Floor_UC':counts.div(fl_tot.where(fl_tot>0),axis=0).mul(100).round(2).fillna(0).stack(),
+        'Pct_of_Overall_UC':counts.div(cat_tot,axis=1).mul(100).round(2).stack()})
+    space_df.index.names=['Floor','SpaceMix']
+    space_df=space_df.reset_index()
 
     unass=[{'Department':b.get('Department_Sub-Department'),
             'Block_Name':b.get('Block_Name'),
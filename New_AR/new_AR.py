@@ -5,6 +5,12 @@ import math
 import PyPDF2
 import re
 
+# floor names are read through the floor registry of the repository's stacking package
+try:
+    from stacking.floors import floor_registry
+except ImportError:
+    raise ImportError("new_AR.py needs the stacking package (pip install -e <repository root>, see README.md)")
+
 # ----------------------------------------
 # Step 1: Load Input Sheets
 # ----------------------------------------
@@ -105,10 +111,11 @@ def get_floor_levels(floor_df):
     """
     floor_levels = {}
     floors = floor_df['Name'].str.strip().tolist()
+    levels = floor_registry(floors)['levels']
 
     # Sort floors to identify lowest, highest, mid
-    # Assuming floors are named with numbers or can be sorted
-    sorted_floors = sorted(floors)
+    # by the level number in their name, so 'L10' sorts above 'L2'
+    sorted_floors = sorted(floors, key=lambda f: (levels[f] is None, levels[f] or 0))
 
     if len(sorted_floors) >= 1:
         floor_levels[sorted_floors[0]] = 'lowest'
@@ -911,10 +918,9 @@ def make_typical_summary(detailed_df):
 
     df['Total_Assigned'] = df.sum(axis=1)
 
-    # Calculate assignment ratio for each block type
-    for block_type in df.index:
-        total_blocks_of_type = len(typical_blocks[typical_blocks['Block_Name'].str.strip() == block_type])
-        df.loc[block_type, 'Assignment_Ratio'] = round(df.loc[block_type, 'Total_Assigned'] / total_blocks_of_type, 3) if total_blocks_of_type > 0 else 0
+    # Assignment ratio for each block type, with all type totals counted in one pass
+    type_totals = typical_blocks['Block_Name'].str.strip().value_counts().reindex(df.index)
+    df['Assignment_Ratio'] = (df['Total_Assigned'] / type_totals.where(type_totals > 0)).round(3).fillna(0)
 
     return df
 
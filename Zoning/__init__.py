@@ -0,0 +1,7 @@
+"""Grid zoning engines from the CS496 UGP notebook as importable modules."""
+
+from .adjacency_solver import generate_colored_grid, solve_no_same_adjacent
+from .weighted_grid import anneal_color_grid, generate_color_grid, grid_score
+from .grid_engine import generate_zone_grid, position_weights, region_map, zone_grid_score
+from .block_grid import FreeWindowIndex, place_blocks
+from .floor_zoning import floor_zone_counts, write_building_zoning, zone_building, zone_stack_plan
@@ -0,0 +1,289 @@
+import heapq
+import random
+
+# ----------------------------------------
+# No-same-adjacent grid colouring as a constraint satisfaction problem
+# ----------------------------------------
+#
+# generate_colored_grid() in the UGP notebook picks a random valid colour for
+# every cell and, when a cell has no valid colour left, silently fills it with
+# any colour.  The solver below replaces that greedy pass with a proper search:
+#
+#   * every unassigned cell keeps a bitmask of the colours it may still take
+#   * the next cell is the one with the fewest colours left (MRV)
+#   * after every assignment the colour counts are forward-checked: a colour
+#     that still needs r cells must be allowed on at least r unassigned cells,
+#     and no more than r cells may be forced to it
+#   * the search restarts with a growing backtrack limit and a new scan order
+#
+# Instances that violate a counting bound are rejected before any search, so
+# large infeasible grids are refused immediately.
+
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # Up, Down, Left, Right
+
+
+def grid_neighbors(n, m):
+    """Returns the 4-neighbourhood of every cell of an n x m grid (row-major ids)."""
+    neighbors = []
+    for r in range(n):
+        for c in range(m):
+            cells = []
+            for dr, dc in DIRECTIONS:
+                nr, nc = r + dr, c + dc
+                if 0 <= nr < n and 0 <= nc < m:
+                    cells.append(nr * m + nc)
+            neighbors.append(cells)
+    return neighbors
+
+
+def check_color_counts(n, m, color_counts):
+    """
+    Checks the counting conditions every valid grid must meet.
+    Returns None if they hold, otherwise a message naming the failed constraint.
+    """
+    total_tiles = n * m
+    if any(count < 0 for count in color_counts.values()):
+        return "count constraint: tile counts cannot be negative"
+    if sum(color_counts.values()) != total_tiles:
+        return (f"total constraint: tile counts sum to {sum(color_counts.values())}, "
+                f"grid has {total_tiles} cells")
+
+    # A colour class is an independent set; the largest independent set of a
+    # grid is one side of its checkerboard.
+    largest_class = (total_tiles + 1) // 2 if total_tiles > 1 else 1
+    for color, count in color_counts.items():
+        if count > largest_class:
+            return (f"adjacency constraint: {count} '{color}' tiles cannot be placed "
+                    f"without touching, at most {largest_class} fit on a {n}x{m} grid")
+    return None
+
+
+class _Search:
+    """One restartable depth-first search over a fixed grid and colour counts."""
+
+    def __init__(self, n, m, colors, counts, neighbors):
+        self.n, self.m = n, m
+        self.colors = colors
+        self.k = len(colors)
+        self.counts = counts
+        self.neighbors = neighbors
+        self.popcount = [bin(mask).count('1') for mask in range(1 << self.k)]
+        self.single = {1 << c: c for c in range(self.k)}
+
+    def reset(self, order):
+        k, full = self.k, (1 << self.k) - 1
+        size = self.n * self.m
+        self.assigned = [-1] * size
+        self.remaining = list(self.counts)
+        self.domain = [0] * size
+        self.support = [0] * k      # unassigned cells that may take colour c
+        self.forced = [0] * k       # unassigned cells that can only take colour c
+        self.buckets = [set() for _ in range(k + 1)]   # domain size -> cells
+        self.heaps = [[] for _ in range(k + 1)]        # same cells by scan rank, lazily pruned
+        self.trail = []
+        self.rank = [0] * size
+
+        exhausted = sum(1 << c for c in range(k) if self.remaining[c] == 0)
+        start = full & ~exhausted
+        for rank, cell in enumerate(order):
+            self.rank[cell] = rank
+            self.domain[cell] = start
+        self.buckets[self.popcount[start]].update(order)
+        self.heaps[self.popcount[start]] = [(rank, cell) for rank, cell in enumerate(order)]
+        for c in range(k):
+            if start >> c & 1:
+                self.support[c] = size
+        if self.popcount[start] == 1:
+            self.forced[self.single[start]] = size
+
+    # -- bookkeeping -----------------------------------------------------------
+
+    def _forget(self, cell):
+        """Removes an unassigned cell's domain from the counters."""
+        mask = self.domain[cell]
+        self.buckets[self.popcount[mask]].discard(cell)
+        c = 0
+        while mask:
+            if mask & 1:
+                self.support[c] -= 1
+            mask >>= 1
+            c += 1
+        if self.domain[cell] in self.single:
+            self.forced[self.single[self.domain[cell]]] -= 1
+
+    def _remember(self, cell):
+        """Adds an unassigned cell's domain to the counters."""
+        mask = self.domain[cell]
+        size = self.popcount[mask]
+        self.buckets[size].add(cell)
+        heapq.heappush(self.heaps[size], (self.rank[cell], cell))
+        c = 0
+        while mask:
+            if mask & 1:
+                self.support[c] += 1
+            mask >>= 1
+            c += 1
+        if self.domain[cell] in self.single:
+            self.forced[self.single[self.domain[cell]]] += 1
+
+    def _set_domain(self, cell, mask):
+        self._forget(cell)
+        self.trail.append((cell, self.domain[cell]))
+        self.domain[cell] = mask
+        self._remember(cell)
+
+    def undo(self, mark):
+        trail = self.trail
+        while len(trail) > mark:
+            cell, old = trail.pop()
+            if old < 0:
+                # (cell, -1 - colour) records an assignment
+                self.remaining[-1 - old] += 1
+                self.assigned[cell] = -1
+                self._remember(cell)
+            else:
+                self._forget(cell)
+                self.domain[cell] = old
+                self._remember(cell)
+
+    # -- search steps ----------------------------------------------------------
+
+    def select(self):
+        """Minimum-remaining-values cell, earliest in the scan order on ties."""
+        for size in range(1, self.k + 1):
+            bucket, heap = self.buckets[size], self.heaps[size]
+            while heap and heap[0][1] not in bucket:
+                heapq.heappop(heap)
+            if heap:
+                return heap[0][1]
+        return None
+
+    def values(self, cell):
+        """Colours for a cell, the colour needing most of its remaining support first."""
+        mask = self.domain[cell]
+        options = [c for c in range(self.k) if mask >> c & 1]
+        # popped from the end, so the best value goes last
+        options.sort(key=lambda c: (self.remaining[c] / self.support[c], random.random()))
+        return options
+
+    def assign(self, cell, color):
+        """Assigns a colour and propagates. Returns None or the violated constraint."""
+        bit = 1 << color
+        self._forget(cell)
+        self.trail.append((cell, -1 - color))
+        self.assigned[cell] = color
+        self.remaining[color] -= 1
+
+        for nb in self.neighbors[cell]:
+            if self.assigned[nb] < 0 and self.domain[nb] & bit:
+                self._set_domain(nb, self.domain[nb] & ~bit)
+                if not self.domain[nb]:
+                    return 'adjacency'
+
+        if self.remaining[color] == 0:
+            # colour used up: strip it from every unassigned cell
+            for size in range(1, self.k + 1):
+                for other in list(self.buckets[size]):
+                    if self.domain[other] & bit:
+                        self._set_domain(other, self.domain[other] & ~bit)
+            if self.buckets[0]:
+                return 'count'
+
+        for c in range(self.k):
+            if self.remaining[c] > self.support[c] or self.forced[c] > self.remaining[c]:
+                return 'count'
+        return None
+
+    def run(self, order, limit):
+        """
+        Runs one DFS.  Returns ('solved', grid), ('exhausted', failures) when the
+        whole tree was searched, or ('limit', failures) when the limit was hit.
+        """
+        self.reset(order)
+        failures = {'adjacency': 0, 'count': 0}
+        cell = self.select()
+        if cell is None:
+            return 'solved', self._grid()
+        stack = [(cell, self.values(cell), len(self.trail))]
+        backtracks = 0
+        while stack:
+            cell, values, mark = stack[-1]
+            self.undo(mark)
+            if not values:
+                stack.pop()
+                continue
+            reason = self.assign(cell, values.pop())
+            if reason:
+                failures[reason] += 1
+                backtracks += 1
+                if backtracks > limit:
+                    return 'limit', failures
+                continue
+            nxt = self.select()
+            if nxt is None:
+                return 'solved', self._grid()
+            stack.append((nxt, self.values(nxt), len(self.trail)))
+        return 'exhausted', failures
+
+    def _grid(self):
+        return [[self.colors[self.assigned[r * self.m + c]] for c in range(self.m)]
+                for r in range(self.n)]
+
+
+def _scan_order(n, m, attempt):
+    """Row-major order first, then flipped/transposed scans with a random start row."""
+    if attempt == 0:
+        return list(range(n * m))
+    transpose = random.random() < 0.5
+    flip_r, flip_c = random.random() < 0.5, random.random() < 0.5
+    rows = list(range(n))[::-1] if flip_r else list(range(n))
+    cols = list(range(m))[::-1] if flip_c else list(range(m))
+    shift = random.randrange(n) if not transpose else random.randrange(m)
+    if transpose:
+        cols = cols[shift:] + cols[:shift]
+        return [r * m + c for c in cols for r in rows]
+    rows = rows[shift:] + rows[:shift]
+    return [r * m + c for r in rows for c in cols]
+
+
+def solve_no_same_adjacent(n, m, color_counts, max_restarts=20, backtrack_limit=200):
+    """
+    Fills an n x m grid with exactly color_counts[c] tiles of every colour c so
+    that no two orthogonally adjacent tiles share a colour.
+
+    Returns (grid, None) on success, otherwise (None, reason) where reason names
+    the constraint that cannot be met.
+    """
+    reason = check_color_counts(n, m, color_counts)
+    if reason:
+        return None, reason
+
+    colors = list(color_counts)
+    counts = [color_counts[c] for c in colors]
+    search = _Search(n, m, colors, counts, grid_neighbors(n, m))
+
+    limit = backtrack_limit
+    failures = {'adjacency': 0, 'count': 0}
+    for attempt in range(max_restarts):
+        status, result = search.run(_scan_order(n, m, attempt), limit)
+        if status == 'solved':
+            return result, None
+        for key, value in result.items():
+            failures[key] += value
+        if status == 'exhausted':
+            worst = max(failures, key=failures.get)
+            return None, (f"{worst} constraint: no grid satisfies the colour counts "
+                          f"without same-colour neighbours (search exhausted)")
+        limit = int(limit * 1.5) + 1
+
+    worst = max(failures, key=failures.get)
+    return None, (f"{worst} constraint: no valid grid found within {max_restarts} restarts "
+                  f"({failures['adjacency']} adjacency / {failures['count']} count conflicts)")
+
+
+def generate_colored_grid(n, m, red_count, green_count, blue_count):
+    """Generates a valid n x m grid with no two adjacent tiles having the same color."""
+    grid, reason = solve_no_same_adjacent(n, m, {'R': red_count, 'G': green_count, 'B': blue_count})
+    if grid is None:
+        print(f"No valid grid: {reason}")
+    return grid
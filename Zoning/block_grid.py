@@ -0,0 +1,157 @@
+import random
+
+import numpy as np
+
+# ----------------------------------------
+# Block constraint: place h x w blocks of one colour
+# ----------------------------------------
+#
+# The notebook's generate_grid() tests every candidate origin with
+# all(grid[r][c] == ' ' ...), which is O(h*w) per origin, and gives up with a
+# warning after one shuffled sweep.  FreeWindowIndex answers "is the h x w
+# window at (r, c) empty?" in O(1): the free windows are computed once from a
+# summed-area table of the occupied cells, and a placement only clears the
+# windows that overlap the new block.  random_free() draws from a pool of the
+# free origins that place() shrinks by the cleared windows, so a draw is O(1)
+# instead of a scan of the whole grid.
+
+
+class FreeWindowIndex:
+    """Free h x w windows of an occupancy mask, kept up to date as blocks are placed."""
+
+    def __init__(self, occupied, height, width, margin=0):
+        occupied = np.asarray(occupied, dtype=bool)
+        n, m = occupied.shape
+        self.height, self.width = height, width
+        self.free = np.zeros((max(n - height + 1, 0), max(m - width + 1, 0)), dtype=bool)
+        self._cursor = 0
+        self._pool = None  # free origins (flat indices) in pool[:size], built on the first random_free()
+        if self.free.size == 0:
+            return
+
+        # summed-area table with a zero row/column in front
+        table = np.zeros((n + 1, m + 1), dtype=np.int64)
+        table[1:, 1:] = occupied.cumsum(axis=0).cumsum(axis=1)
+        window_sums = (table[height:, width:] - table[:-height, width:]
+                       - table[height:, :-width] + table[:-height, :-width])
+        self.free = window_sums == 0
+
+        if margin:
+            # keep blocks `margin` cells away from the grid edge
+            self.free[:margin, :] = False
+            self.free[:, :margin] = False
+            self.free[self.free.shape[0] - margin:, :] = False
+            self.free[:, self.free.shape[1] - margin:] = False
+
+    def is_free(self, r, c):
+        return 0 <= r < self.free.shape[0] and 0 <= c < self.free.shape[1] and bool(self.free[r, c])
+
+    def first_free(self):
+        """Row-major first free origin, or None.  Amortised O(1): windows never become free again."""
+        flat = self.free.ravel()
+        while self._cursor < flat.size and not flat[self._cursor]:
+            self._cursor += 1
+        if self._cursor == flat.size:
+            return None
+        return divmod(self._cursor, self.free.shape[1])
+
+    def random_free(self, rng):
+        """Uniformly drawn free origin, or None.  O(1) after the pool is built once."""
+        if self._pool is None:
+            self._pool = np.flatnonzero(self.free)
+            self._slot = np.full(self.free.size, -1, dtype=np.int64)
+            self._slot[self._pool] = np.arange(self._pool.size)
+            self._size = self._pool.size
+        if self._size == 0:
+            return None
+        return divmod(int(self._pool[rng.randrange(self._size)]), self.free.shape[1])
+
+    def place(self, r, c):
+        """Marks the block at origin (r, c) as occupied; every overlapping window stops being free."""
+        top, left = max(r - self.height + 1, 0), max(c - self.width + 1, 0)
+        window = self.free[top:r + self.height, left:c + self.width]
+        if self._pool is not None:
+            rows, cols = np.nonzero(window)
+            for flat in ((rows + top) * self.free.shape[1] + cols + left).tolist():
+                self._discard(flat)
+        window[:] = False
+
+    def _discard(self, flat):
+        # swap-remove: the last origin of the pool takes the slot of the removed one
+        i = self._slot[flat]
+        self._size -= 1
+        last = self._pool[self._size]
+        self._pool[i] = last
+        self._slot[last] = i
+        self._slot[flat] = -1
+
+
+def place_blocks(grid, block_color, block_shape, block_count, margin=0, shuffle=False, rng=None):
+    """
+    Places up to block_count blocks of block_shape = (height, width) on the
+    empty (' ') cells of grid.  Blocks go row-major first-fit unless shuffle
+    is set, in which case each block picks a random free origin.
+    Returns the origins of the placed blocks.
+    """
+    height, width = block_shape
+    index = FreeWindowIndex([[cell != ' ' for cell in row] for row in grid], height, width, margin)
+    rng = rng or random
+    origins = []
+    while len(origins) < block_count:
+        origin = index.random_free(rng) if shuffle else index.first_free()
+        if origin is None:
+            break
+        r, c = origin
+        for row in grid[r:r + height]:
+            row[c:c + width] = [block_color] * width
+        index.place(r, c)
+        origins.append(origin)
+    return origins
+
+
+def generate_grid(n, m, red, green, blue, block_color, block_size, block_count,
+                  periphery_order=None, shuffle=False, seed=None):
+    """
+    Block-constrained grid: block_count blocks of block_color, each block_size
+    (k for k x k, or (height, width)), then random fill of the rest.
+    With periphery_order the border is filled first in that colour order and
+    blocks stay off the border, as in the periphery + block notebook variant.
+    """
+    if n * m != red + green + blue:
+        print("Error: The total number of colored cells does not match the grid size!")
+        return []
+
+    height, width = (block_size, block_size) if isinstance(block_size, int) else block_size
+    rng = random.Random(seed)
+    grid = [[' ' for _ in range(m)] for _ in range(n)]
+    color_counts = {'R': red, 'G': green, 'B': blue}
+
+    if periphery_order:
+        positions = [(0, i) for i in range(m)] + [(n - 1, i) for i in range(m)] + \
+                    [(i, 0) for i in range(1, n - 1)] + [(i, m - 1) for i in range(1, n - 1)]
+        rng.shuffle(positions)
+        for color in periphery_order:
+            for x, y in positions:
+                if grid[x][y] == ' ' and color_counts.get(color, 0) > 0:
+                    grid[x][y] = color
+                    color_counts[color] -= 1
+
+    max_possible_blocks = min(block_count, color_counts.get(block_color, 0) // (height * width))
+    origins = place_blocks(grid, block_color, (height, width), max_possible_blocks,
+                           margin=1 if periphery_order else 0, shuffle=shuffle, rng=rng)
+    color_counts[block_color] -= len(origins) * height * width
+
+    if len(origins) < block_count:
+        print(f"Warning: Could only place {len(origins)} out of {block_count} blocks.")
+
+    empty_positions = [(r, c) for r in range(n) for c in range(m) if grid[r][c] == ' ']
+    rng.shuffle(empty_positions)
+
+    for r, c in empty_positions:
+        available_colors = [color for color in color_counts if color_counts[color] > 0]
+        if available_colors:
+            chosen_color = rng.choice(available_colors)
+            grid[r][c] = chosen_color
+            color_counts[chosen_color] -= 1
+
+    return grid
@@ -0,0 +1,118 @@
+import csv
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .grid_engine import generate_zone_grid
+
+# ----------------------------------------
+# Stacking -> zoning: one zoning grid per stacked floor
+# ----------------------------------------
+#
+# run_stack_plan() returns a detailed_df with one row per placed block
+# (Floor, SpaceMix, Assigned_Area_SQM, ...).  floor_zone_counts() turns the
+# area of every SpaceMix category on a floor into cell counts for a
+# rows x cols floor grid; zone_building() then runs generate_zone_grid() for
+# every floor in a process pool and yields the floors one at a time, in
+# floor order, so a whole building never has to sit in memory.
+
+SPACE_MIX_ZONES = ['ME', 'WE', 'US', 'Support', 'Speciality']
+FREE_ZONE = 'Free'  # usable area no block was assigned to
+
+
+def largest_remainder(shares, total):
+    """Integer counts proportional to shares that add up to exactly total."""
+    weight = sum(shares.values())
+    if weight <= 0:
+        return {key: 0 for key in shares}
+    raw = {key: share / weight * total for key, share in shares.items()}
+    counts = {key: math.floor(value) for key, value in raw.items()}
+    diff = total - sum(counts.values())
+    for key in sorted(raw, key=lambda k: raw[k] - counts[k], reverse=True)[:diff]:
+        counts[key] += 1
+    return counts
+
+
+def floor_zone_counts(detailed_df, rows, cols, floor_areas=None, zones=None,
+                      zone_col='SpaceMix', area_col='Assigned_Area_SQM'):
+    """
+    Cell counts per floor and zone type: {floor: {zone: cells}}.
+
+    The grid of every floor is split in proportion to the assigned area of
+    each zone type.  With floor_areas ({floor: usable area}) the unassigned
+    part of the floor becomes FREE_ZONE cells.
+    """
+    zones = list(zones or SPACE_MIX_ZONES)
+    areas = (detailed_df.assign(_zone=detailed_df[zone_col].astype(str).str.strip())
+             .pivot_table(index='Floor', columns='_zone', values=area_col, aggfunc='sum', fill_value=0))
+
+    floors = list(floor_areas) if floor_areas else list(areas.index)
+    counts = {}
+    for fl in floors:
+        shares = {z: float(areas.at[fl, z]) if fl in areas.index and z in areas.columns else 0.0
+                  for z in zones}
+        if floor_areas:
+            shares[FREE_ZONE] = max(float(floor_areas[fl]) - sum(shares.values()), 0.0)
+        if sum(shares.values()) <= 0:
+            shares = {FREE_ZONE: 1.0, **{z: 0.0 for z in zones}}
+        counts[fl] = largest_remainder(shares, rows * cols)
+    return counts
+
+
+def _zone_floor(args):
+    floor, rows, cols, zone_counts, quadrant_weights, extra_weights, adjacency, kwargs = args
+    zones = list(zone_counts)
+    grid, score = generate_zone_grid(
+        rows, cols, zone_counts,
+        {z: quadrant_weights.get(z, [0.0] * 4) for z in zones},
+        {z: extra_weights.get(z, [0.0] * 5) for z in zones},
+        [[adjacency.get(a, {}).get(b, adjacency.get(b, {}).get(a, 0.0)) for b in zones] for a in zones],
+        **kwargs)
+    return floor, grid, score
+
+
+def zone_building(floor_counts, rows, cols, quadrant_weights=None, extra_weights=None,
+                  adjacency=None, max_workers=None, seed=None, **kwargs):
+    """
+    Zones every floor of a building in parallel.
+
+    floor_counts comes from floor_zone_counts().  Weights are keyed by zone
+    type; zone types without weights get zeros.  Extra keyword arguments go
+    to generate_zone_grid() (quadrant_orders, improve_seconds).
+
+    Yields (floor, grid, score) in floor order.  At most 2 * max_workers
+    floors are in flight, so memory stays bounded on tall buildings.
+    """
+    quadrant_weights = quadrant_weights or {}
+    extra_weights = extra_weights or {}
+    adjacency = adjacency or {}
+    jobs = ((fl, rows, cols, counts, quadrant_weights, extra_weights, adjacency,
+             dict(kwargs, seed=None if seed is None else seed + i))
+            for i, (fl, counts) in enumerate(floor_counts.items()))
+
+    max_workers = max_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        window = 2 * max_workers
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_zone_floor, job))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def zone_stack_plan(detailed_df, rows, cols, floor_areas=None, **kwargs):
+    """One-pass building test-fit: floor_zone_counts() followed by zone_building()."""
+    return zone_building(floor_zone_counts(detailed_df, rows, cols, floor_areas), rows, cols, **kwargs)
+
+
+def write_building_zoning(results, path):
+    """Streams (floor, grid, score) results to a CSV with one row per cell."""
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Floor', 'Row', 'Col', 'Zone'])
+        for floor, grid, _ in results:
+            for r, row in enumerate(grid):
+                writer.writerows([floor, r, c, zone] for c, zone in enumerate(row))
@@ -0,0 +1,159 @@
+import itertools
+import random
+
+import numpy as np
+
+from .weighted_grid import anneal_labels
+
+# ----------------------------------------
+# N-zone-type weighted grid engine
+# ----------------------------------------
+#
+# The notebook generators work with three colours ('RGB').  A floor plate has
+# many more zone types (workstations, meeting, support, speciality, ...), so
+# this engine takes any number N of zone types:
+#
+#   zone_counts      {zone: cells}                      ordered, N entries
+#   quadrant_weights N x 4 (UL, UR, LL, LR)             array or {zone: list}
+#   extra_weights    N x 5 (+x, -x, +y, -y, O)          array or {zone: list}
+#   adjacency        N x N, symmetric                   array or {zone: {zone: w}}
+#
+# The R/G/B dictionaries used by generate_color_grid() are accepted as is.
+# Scoring and neighbourhood sums are numpy operations over the whole grid.
+
+
+def region_map(rows, cols):
+    """Weight slot of every cell: 0..3 quadrants (UL, UR, LL, LR), 4..8 extra positions."""
+    r, c = np.indices((rows, cols))
+    region = (r >= rows // 2) * 2 + (c >= cols // 2)
+    if rows % 2 == 1:
+        middle = r == rows // 2
+        region[middle & (c > cols // 2)] = 4
+        region[middle & (c < cols // 2)] = 5
+    if cols % 2 == 1:
+        centre = c == cols // 2
+        region[centre & (r < rows // 2)] = 6
+        region[centre & (r > rows // 2)] = 7
+        if rows % 2 == 1:
+            region[rows // 2, cols // 2] = 8
+    return region
+
+
+def _matrix(values, zones, width, name):
+    """Turns a {zone: list} dictionary or an array into an N x width float array."""
+    if isinstance(values, dict):
+        values = [values[z] for z in zones]
+    matrix = np.asarray(values, dtype=float)
+    if matrix.shape != (len(zones), width):
+        raise ValueError(f"{name} must have {width} weights for each of the {len(zones)} zone types")
+    return matrix
+
+
+def _adjacency_matrix(adjacency, zones):
+    if isinstance(adjacency, dict):
+        adjacency = [[adjacency.get(a, {}).get(b, 0) for b in zones] for a in zones]
+    matrix = np.asarray(adjacency, dtype=float)
+    if matrix.shape != (len(zones), len(zones)):
+        raise ValueError(f"Adjacency weights must be a {len(zones)} x {len(zones)} matrix")
+    if not np.allclose(matrix, matrix.T):
+        raise ValueError("Adjacency weights must be symmetric")
+    return matrix
+
+
+def position_weights(quadrant_weights, extra_weights, zones):
+    """N x 9 table of the weight of every zone type in every region slot."""
+    return np.hstack([_matrix(quadrant_weights, zones, 4, "Quadrant weights"),
+                      _matrix(extra_weights, zones, 5, "Extra weights")])
+
+
+def zone_grid_score(labels, weights, adjacency):
+    """
+    Score of a grid of zone indices: position weight of every cell plus the
+    adjacency weight of every horizontally or vertically neighbouring pair.
+    """
+    labels = np.asarray(labels)
+    regions = region_map(*labels.shape)
+    score = weights[labels, regions].sum()
+    score += adjacency[labels[:, :-1], labels[:, 1:]].sum()
+    score += adjacency[labels[:-1, :], labels[1:, :]].sum()
+    return float(score)
+
+
+def _greedy_fill(rows, cols, counts, weights, adjacency, regions, order, rng):
+    """
+    One greedy pass: quadrants in the given order, then the extra positions.
+    Each cell takes the zone type with the best position weight plus affinity
+    to the neighbours already placed, among types with cells left.
+    """
+    size = rows * cols
+    labels = np.full(size, -1)
+    remaining = counts.copy()
+    blocked = np.where(remaining > 0, 0.0, -np.inf)
+    affinity = np.zeros((size, len(counts)))
+    flat_regions = regions.ravel()
+    score = 0.0
+
+    sequence = []
+    for quadrant in order:
+        cells = np.flatnonzero(flat_regions == quadrant).tolist()
+        rng.shuffle(cells)
+        sequence += cells
+    extras = np.flatnonzero(flat_regions >= 4).tolist()
+    rng.shuffle(extras)
+    sequence += extras
+
+    for cell in sequence:
+        scores = weights[:, flat_regions[cell]] + affinity[cell] + blocked
+        zone = int(np.argmax(scores))
+        labels[cell] = zone
+        score += scores[zone]
+        remaining[zone] -= 1
+        if remaining[zone] == 0:
+            blocked[zone] = -np.inf
+        r, c = divmod(cell, cols)
+        for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+            if 0 <= nr < rows and 0 <= nc < cols:
+                affinity[nr * cols + nc] += adjacency[zone]
+    return labels.reshape(rows, cols), score
+
+
+def generate_zone_grid(rows, cols, zone_counts, quadrant_weights, extra_weights, adjacency,
+                       quadrant_orders=24, improve_seconds=0, seed=None):
+    """
+    Weighted zoning for any number of zone types.
+
+    Runs the greedy quadrant/extra pass of generate_color_grid() for up to
+    `quadrant_orders` quadrant orders, keeps the best grid and, when
+    improve_seconds is set, anneals it with count-preserving swaps for the
+    whole budget (no early stop).
+
+    Returns (grid, score) with grid as a list of rows of zone labels.
+    """
+    if not (isinstance(rows, int) and isinstance(cols, int) and rows > 0 and cols > 0):
+        raise ValueError("Rows and columns must be positive integers")
+    zones = list(zone_counts)
+    counts = np.array([zone_counts[z] for z in zones], dtype=int)
+    if (counts < 0).any():
+        raise ValueError("Cell counts cannot be negative")
+    if counts.sum() != rows * cols:
+        raise ValueError("Sum of cell counts must equal total grid size")
+    weights = position_weights(quadrant_weights, extra_weights, zones)
+    adjacency = _adjacency_matrix(adjacency, zones)
+
+    rng = random.Random(seed)
+    regions = region_map(rows, cols)
+    orders = list(itertools.permutations([0, 1, 3, 2]))[:quadrant_orders]  # UL, UR, LR, LL
+    best_labels, best_score = None, -np.inf
+    for order in orders:
+        labels, score = _greedy_fill(rows, cols, counts, weights, adjacency, regions, order, rng)
+        if score > best_score:
+            best_labels, best_score = labels, score
+
+    if improve_seconds:
+        cells, best_score = anneal_labels(best_labels.ravel().tolist(), rows, cols,
+                                          weights[:, regions.ravel()].tolist(), adjacency.tolist(),
+                                          zone_grid_score(best_labels, weights, adjacency),
+                                          time_budget=improve_seconds, seed=seed)
+        best_labels = np.array(cells).reshape(rows, cols)
+
+    return [[zones[z] for z in row] for row in best_labels.tolist()], float(best_score)
@@ -0,0 +1,353 @@
+import itertools
+import math
+import random
+import time
+
+# ----------------------------------------
+# Weighted quadrant / extra / adjacency zoning
+# ----------------------------------------
+#
+# generate_color_grid() is the weighted generator from the UGP notebook: a
+# greedy pass over the four quadrants and the centre lines, tried for every
+# quadrant order.  anneal_color_grid() is an improvement stage on top of it
+# that swaps two differently coloured cells at a time, so the R/G/B counts
+# never change, and scores each swap from the two cells' neighbourhoods only.
+
+QUADRANTS = ['UL', 'UR', 'LL', 'LR']            # weight list index 0..3
+EXTRA_POSITIONS = ['+x', '-x', '+y', '-y', 'O']  # extra weight index 0..4
+
+
+def cell_regions(rows, cols):
+    """
+    Returns the weight slot of every cell (row-major): 0..3 for the quadrants
+    and 4..8 for the extra positions, which the greedy pass fills last.
+    """
+    regions = []
+    for r in range(rows):
+        for c in range(cols):
+            region = (2 if r >= rows // 2 else 0) + (1 if c >= cols // 2 else 0)
+            if rows % 2 == 1 and r == rows // 2:
+                if c > cols // 2:
+                    region = 4
+                elif c < cols // 2:
+                    region = 5
+            if cols % 2 == 1 and c == cols // 2:
+                if r < rows // 2:
+                    region = 6
+                elif r > rows // 2:
+                    region = 7
+                elif rows % 2 == 1:
+                    region = 8
+            regions.append(region)
+    return regions
+
+
+def grid_score(grid, color_weights, extra_weights, adj_weights):
+    """Quadrant/extra weight of every cell plus the adjacency weight of every neighbouring pair."""
+    rows, cols = len(grid), len(grid[0])
+    regions = cell_regions(rows, cols)
+    score = 0.0
+    for r in range(rows):
+        for c in range(cols):
+            color = grid[r][c]
+            region = regions[r * cols + c]
+            if region < 4:
+                score += color_weights[color][region]
+            else:
+                score += extra_weights[color][region - 4]
+            if c + 1 < cols:
+                score += adj_weights[color].get(grid[r][c + 1], 0)
+            if r + 1 < rows:
+                score += adj_weights[color].get(grid[r + 1][c], 0)
+    return score
+
+
+def grid_neighbors(rows, cols):
+    """Returns the 4-neighbourhood of every cell (row-major ids)."""
+    neighbors = []
+    for r in range(rows):
+        for c in range(cols):
+            neighbors.append([(r + dr) * cols + c + dc for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]
+                              if 0 <= r + dr < rows and 0 <= c + dc < cols])
+    return neighbors
+
+
+def anneal_labels(cells, rows, cols, weight, adjacency, score, time_budget=1.0,
+                  max_iters=None, t_start=None, t_end=1e-3, patience=None, seed=None):
+    """
+    Simulated annealing over swaps of two differently labelled cells.
+
+    cells is the row-major list of label indices and is modified in place,
+    weight[t][i] is the position weight of label t on cell i, adjacency[t][u]
+    the weight of a t-u neighbouring pair and score the current grid score.
+    The change of a swap is computed from the two cells and their neighbours.
+    The temperature cools geometrically from t_start (estimated from sampled
+    moves when None) to t_end over the time budget or max_iters, whichever ends
+    first.  With `patience` set, the run stops early after that many moves
+    without a new best, counted only once the temperature has cooled to
+    within 10 * t_end (while the search is hot, a stale stretch says nothing).
+    By default it uses the whole budget.
+
+    Returns (cells, best_score) with cells holding the best grid found.
+    """
+    rng = random.Random(seed)
+    size = rows * cols
+    k = len(weight)
+    neighbors = grid_neighbors(rows, cols)
+
+    positions = [[] for _ in range(k)]
+    slot = [0] * size
+    for i, label in enumerate(cells):
+        slot[i] = len(positions[label])
+        positions[label].append(i)
+    if sum(1 for p in positions if p) < 2:
+        return cells, score
+
+    def delta(i, j):
+        a, b = cells[i], cells[j]
+        d = weight[b][i] + weight[a][j] - weight[a][i] - weight[b][j]
+        adj_a, adj_b = adjacency[a], adjacency[b]
+        for x in neighbors[i]:
+            if x != j:
+                cx = cells[x]
+                d += adj_b[cx] - adj_a[cx]
+        for y in neighbors[j]:
+            if y != i:
+                cy = cells[y]
+                d += adj_a[cy] - adj_b[cy]
+        return d
+
+    def swap(i, j):
+        a, b = cells[i], cells[j]
+        cells[i], cells[j] = b, a
+        si, sj = slot[i], slot[j]
+        positions[a][si], positions[b][sj] = j, i
+        slot[i], slot[j] = sj, si
+
+    def pick():
+        """A random pair of cells with different labels."""
+        i = rng.randrange(size)
+        a = cells[i]
+        r = rng.randrange(size - len(positions[a]))
+        for b in range(k):
+            if b != a:
+                if r < len(positions[b]):
+                    return i, positions[b][r]
+                r -= len(positions[b])
+
+    if not time_budget and not max_iters:
+        raise ValueError("anneal_labels needs a time_budget or max_iters")
+    if t_start is None:
+        samples = [abs(delta(*pick())) for _ in range(200)]
+        t_start = max(sum(samples) / len(samples), t_end * 10)
+
+    best_score = score
+    since_best = []  # swaps made since the best grid, undone at the end
+    stale = 0        # cold moves since the best grid
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    start = time.perf_counter()
+    temperature = t_start
+    cold = False
+    cooling = math.log(t_end / t_start)
+    it = 0
+    while True:
+        if it & 1023 == 0:
+            # refresh the schedule and check the stopping rules
+            progress = 0.0
+            if deadline is not None:
+                now = time.perf_counter()
+                if now >= deadline:
+                    break
+                progress = (now - start) / time_budget
+            if max_iters:
+                if it >= max_iters:
+                    break
+                progress = max(progress, it / max_iters)
+            if patience is not None and stale > patience:
+                break
+            temperature = t_start * math.exp(cooling * progress)
+            cold = temperature <= 10 * t_end
+        it += 1
+        if cold:
+            stale += 1
+
+        i, j = pick()
+        d = delta(i, j)
+        if d >= 0 or rng.random() < math.exp(d / temperature):
+            swap(i, j)
+            score += d
+            if score > best_score + 1e-9:
+                best_score = score
+                since_best.clear()
+                stale = 0
+            else:
+                since_best.append((i, j))
+
+    for i, j in reversed(since_best):
+        swap(i, j)
+    return cells, best_score
+
+
+def anneal_color_grid(grid, color_weights, extra_weights, adj_weights, time_budget=1.0,
+                      max_iters=None, t_start=None, t_end=1e-3, patience=None, seed=None):
+    """
+    Improves a filled grid by simulated annealing over colour swaps.
+
+    Each move swaps two cells of different colour, so the colour counts are
+    kept.  See anneal_labels() for the schedule and stopping rules.
+
+    Returns (best_grid, best_score).
+    """
+    rows, cols = len(grid), len(grid[0])
+    colors = sorted({cell for row in grid for cell in row})
+    index = {color: i for i, color in enumerate(colors)}
+
+    # flat lookup tables: weight[color][cell], adjacency[color][color]
+    regions = cell_regions(rows, cols)
+    weight = [[color_weights[color][reg] if reg < 4 else extra_weights[color][reg - 4]
+               for reg in regions] for color in colors]
+    adjacency = [[adj_weights[a].get(b, 0) for b in colors] for a in colors]
+
+    cells = [index[cell] for row in grid for cell in row]
+    score = grid_score(grid, color_weights, extra_weights, adj_weights)
+    cells, best_score = anneal_labels(cells, rows, cols, weight, adjacency, score,
+                                      time_budget=time_budget, max_iters=max_iters,
+                                      t_start=t_start, t_end=t_end, patience=patience, seed=seed)
+    best = [[colors[cells[r * cols + c]] for c in range(cols)] for r in range(rows)]
+    return best, best_score
+
+
+def generate_color_grid(rows, cols, red, green, blue, red_weights, green_weights, blue_weights,
+                        red_extra_weights, green_extra_weights, blue_extra_weights, adj_weights,
+                        improve_seconds=0):
+    # Validate grid dimensions
+    if not (isinstance(rows, int) and isinstance(cols, int) and rows > 0 and cols > 0):
+        raise ValueError("Rows and columns must be positive integers")
+
+    # Validate cell counts
+    if not (isinstance(red, int) and isinstance(green, int) and isinstance(blue, int)):
+        raise ValueError("Cell counts must be integers")
+    if red < 0 or green < 0 or blue < 0:
+        raise ValueError("Cell counts cannot be negative")
+    if red + green + blue != rows * cols:
+        raise ValueError("Sum of cell counts must equal total grid size")
+
+    # Validate weight lists
+    for weights, name in [(red_weights, "Red"), (green_weights, "Green"), (blue_weights, "Blue")]:
+        if not (isinstance(weights, list) and len(weights) == 4 and abs(sum(weights) - 10) < 1e-6):
+            raise ValueError(f"{name} quadrant weights must be 4 numbers summing to 10")
+
+    for weights, name in [(red_extra_weights, "Red"), (green_extra_weights, "Green"), (blue_extra_weights, "Blue")]:
+        if not (isinstance(weights, list) and len(weights) == 5 and abs(sum(weights) - 10) < 1e-6):
+            raise ValueError(f"{name} extra weights must be 5 numbers summing to 10")
+
+    # Validate adjacency weights
+    if not isinstance(adj_weights, dict) or not all(c in adj_weights for c in 'RGB'):
+        raise ValueError("Adjacency weights must be a dictionary with R, G, B keys")
+    weight_sum = adj_weights['R'].get('G', 0) + adj_weights['R'].get('B', 0) + adj_weights['G'].get('B', 0)
+    if abs(weight_sum - 10) > 1e-6:
+        raise ValueError("Adjacency weights must sum to 10")
+
+    def generate_empty_grid(rows, cols):
+        return [['-' for _ in range(cols)] for _ in range(rows)]
+
+    def count_neighbors(grid, row, col, rows, cols):
+        neighbors = {'R': 0, 'G': 0, 'B': 0}
+        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
+            nr, nc = row + dr, col + dc
+            if 0 <= nr < rows and 0 <= nc < cols and grid[nr][nc] in neighbors:
+                neighbors[grid[nr][nc]] += 1
+        return neighbors
+
+    def fill_quadrant(grid, quadrant, color_counts, color_weights, adj_weights, rows, cols, score):
+        quadrant_map = {
+            'UL': (0, 0, rows // 2, cols // 2),
+            'UR': (0, cols // 2, rows // 2, cols),
+            'LL': (rows // 2, 0, rows, cols // 2),
+            'LR': (rows // 2, cols // 2, rows, cols)
+        }
+
+        r_start, c_start, r_end, c_end = quadrant_map[quadrant]
+        positions = [(r, c) for r in range(r_start, r_end) for c in range(c_start, c_end)]
+        random.shuffle(positions)
+
+        for r, c in positions:
+            neighbor_counts = count_neighbors(grid, r, c, rows, cols)
+            scores = {
+                color: color_weights[color][list(quadrant_map.keys()).index(quadrant)] +
+                    sum(neighbor_counts[n] * adj_weights[color].get(n, 0) for n in 'RGB')
+                for color in 'RGB'
+            }
+
+            sorted_colors = sorted(scores.keys(), key=lambda c: scores[c], reverse=True)
+
+            for best_color in sorted_colors:
+                if color_counts[best_color] > 0:
+                    grid[r][c] = best_color
+                    color_counts[best_color] -= 1
+                    score[0] += scores[best_color]
+                    break
+
+    def fill_extra_cells(grid, color_counts, extra_weights, adj_weights, rows, cols, score):
+        extra_positions = []
+        extra_weight_map = {
+            "+x": 0, "-x": 1, "+y": 2, "-y": 3, "O": 4
+        }
+
+        if rows % 2 == 1:
+            extra_positions += [(rows // 2, c, "+x") for c in range(cols // 2 + 1, cols)]
+            extra_positions += [(rows // 2, c, "-x") for c in range(0, cols // 2)]
+
+        if cols % 2 == 1:
+            extra_positions += [(r, cols // 2, "+y") for r in range(0, rows // 2)]
+            extra_positions += [(r, cols // 2, "-y") for r in range(rows // 2 + 1, rows)]
+
+        if rows % 2 == 1 and cols % 2 == 1:
+            extra_positions.append((rows // 2, cols // 2, "O"))
+
+        random.shuffle(extra_positions)
+
+        for r, c, pos_type in extra_positions:
+            neighbor_counts = count_neighbors(grid, r, c, rows, cols)
+            weight_index = extra_weight_map[pos_type]
+
+            scores = {
+                color: extra_weights[color][weight_index] +
+                    sum(neighbor_counts[n] * adj_weights[color].get(n, 0) for n in 'RGB')
+                for color in 'RGB'
+            }
+
+            sorted_colors = sorted(scores.keys(), key=lambda c: scores[c], reverse=True)
+
+            for best_color in sorted_colors:
+                if color_counts[best_color] > 0:
+                    grid[r][c] = best_color
+                    color_counts[best_color] -= 1
+                    score[0] += scores[best_color]
+                    break
+
+    best_grids = []
+    quadrant_orders = list(itertools.permutations(['UL', 'UR', 'LR', 'LL']))[:24]
+    color_weights = {'R': red_weights, 'G': green_weights, 'B': blue_weights}
+    extra_weights = {'R': red_extra_weights, 'G': green_extra_weights, 'B': blue_extra_weights}
+
+    for quadrant_order in quadrant_orders:
+        grid = generate_empty_grid(rows, cols)
+        color_counts = {'R': red, 'G': green, 'B': blue}
+        score = [0]
+
+        for quadrant in quadrant_order:
+            fill_quadrant(grid, quadrant, color_counts, color_weights, adj_weights, rows, cols, score)
+
+        fill_extra_cells(grid, color_counts, extra_weights, adj_weights, rows, cols, score)
+
+        best_grids.append((score[0], grid))
+
+    best_grids.sort(reverse=True, key=lambda x: x[0])
+    best_grid = best_grids[0][1]
+
+    # Improvement stage: anneal the best greedy grid, counts stay fixed
+    if improve_seconds:
+        best_grid, _ = anneal_color_grid(best_grid, color_weights, extra_weights, adj_weights,
+                                         time_budget=improve_seconds)
+    return best_grid  # Return the best grid
@@ -0,0 +1,19 @@
+"""One stacking core for every case workbook; case differences are configuration."""
+
+from .anytime import AnytimeStack, stack_within
+from .cache import ResultCache
+from .cases import CASES, MODES, PRIORITY_CATEGORIES, case_config
+from .engine import run_all, run_stack_plan, stack
+from .flow import solve_transport
+from .hierarchy import business_unit
+from .floors import floor_registry, level_number, match_level, order_floors, vertical_spread
+from .inputs import build_program, load_program
+from .pareto import explore, plan_objectives
+from .outputs import build_outputs, build_reports, make_typical_summary, write_plan
+from .phases import PHASES, register_phase
+from .precheck import precheck, relaxation_bound
+from .planfile import diff_plans, load_plan, save_plan
+from .rejections import rejection_summary
+from .reports import PlanReports
+from .schema import normalize_columns
+from .streaming import read_blocks, stream_stack
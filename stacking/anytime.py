@@ -0,0 +1,143 @@
+import random
+import threading
+import time
+
+from .engine import stack
+from .outputs import build_outputs
+from .pareto import OBJECTIVES, plan_objectives
+from .phases import PHASES, category_order
+
+# ----------------------------------------
+# Anytime stacking within a time budget
+# ----------------------------------------
+#
+# AnytimeStack(program, mode, category, budget=2.0) runs the case's greedy
+# plan straight away, so there is always an answer, and then keeps stacking
+# variations of it on a background thread until the budget runs out or
+# cancel() is called: the other typical phases in place of the case's one,
+# other orders of the categories after the priority category, and other
+# seeds.  A variation replaces the best plan when its objectives (pareto.py)
+# are lexicographically smaller, unassigned area first.  result() hands back
+# the best plan's four tables once the deadline passes; a stack already
+# running then is left to finish in the background and discarded.
+# on_progress(info) is called from the background thread after every
+# variation.
+
+TYPICAL_PHASES = ['typical_by_category', 'typical_fill', 'typical_flow', 'typical_hierarchical']
+
+
+def phase_variants(phases):
+    """phases, then phases with its typical phase swapped for each other one."""
+    current = next((p for p in phases if p in TYPICAL_PHASES), None)
+    if current is None:
+        return [list(phases)]
+    return [list(phases)] + [[alt if p == current else p for p in phases]
+                             for alt in TYPICAL_PHASES if alt != current and alt in PHASES]
+
+
+def variations(program, priority_category='ME', seed=None):
+    """
+    Endless {'Phases', 'Category_Order', 'Seed'} strategies: every phase
+    variant with the given order and seed first, then random draws keeping
+    the priority category(ies) in front.
+    """
+    rng = random.Random(seed)
+    variants = phase_variants(program['config']['phases'])
+    order = category_order(priority_category)
+    given = [priority_category] if isinstance(priority_category, str) else list(priority_category)
+    first = order[:len(set(given) & set(order))]
+    for phases in variants:
+        yield {'Phases': phases, 'Category_Order': order, 'Seed': seed}
+    while True:
+        rest = order[len(first):]
+        yield {'Phases': rng.choice(variants), 'Category_Order': first + rng.sample(rest, len(rest)),
+               'Seed': rng.randrange(2 ** 31)}
+
+
+def _score(objectives):
+    return tuple(objectives[k] for k in OBJECTIVES)
+
+
+class AnytimeStack:
+    """A greedy plan at once and the best variation found before the deadline (see the module comment)."""
+
+    def __init__(self, program, mode='centralized', priority_category='ME', budget=2.0, seed=None,
+                 on_progress=None):
+        self.start = time.monotonic()
+        self.deadline = self.start + budget
+        self.program = program
+        self.mode = mode
+        self.on_progress = on_progress
+        self.evaluated = 0
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._strategies = variations(program, priority_category, seed)
+        strategy = next(self._strategies)
+        plan = stack(program, mode, priority_category, seed)
+        self._best = (_score(plan_objectives(plan)), plan, strategy)
+        self.greedy_objectives = plan_objectives(plan)
+        self._thread = threading.Thread(target=self._improve, daemon=True)
+        self._thread.start()
+
+    def _improve(self):
+        for strategy in self._strategies:
+            if self._cancelled.is_set() or time.monotonic() >= self.deadline:
+                break
+            try:
+                plan = stack(self.program, self.mode, strategy['Category_Order'], strategy['Seed'],
+                             strategy['Phases'])
+            except (ImportError, ValueError):
+                continue  # e.g. typical_flow without scipy
+            if self._cancelled.is_set() or time.monotonic() >= self.deadline:
+                break
+            objectives = plan_objectives(plan)
+            with self._lock:
+                self.evaluated += 1
+                improved = _score(objectives) < self._best[0]
+                if improved:
+                    self._best = (_score(objectives), plan, strategy)
+                best_objectives = dict(zip(OBJECTIVES, self._best[0]))
+            if self.on_progress is not None:
+                self.on_progress(dict(best_objectives, Evaluated=self.evaluated, Improved=improved,
+                                      Elapsed_s=round(time.monotonic() - self.start, 3)))
+
+    def cancel(self):
+        """Stops the search; result() returns the best plan so far straight away."""
+        self._cancelled.set()
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    @property
+    def best_plan(self):
+        with self._lock:
+            return self._best[1]
+
+    @property
+    def best_strategy(self):
+        """{'Phases', 'Category_Order', 'Seed'} of the best plan so far."""
+        with self._lock:
+            return self._best[2]
+
+    @property
+    def best_objectives(self):
+        with self._lock:
+            return dict(zip(OBJECTIVES, self._best[0]))
+
+    def result(self):
+        """
+        Waits for the deadline (or cancel()) and returns the best plan's
+        detailed_df, floor_summary_df, space_mix_df, unassigned_df.
+        """
+        while not self._cancelled.is_set() and self._thread.is_alive():
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self._cancelled.wait(min(remaining, 0.05))
+        self._cancelled.set()
+        return build_outputs(self.best_plan)
+
+
+def stack_within(program, mode='centralized', priority_category='ME', budget=2.0, seed=None, on_progress=None):
+    """run_stack_plan() with a time budget in seconds: the best plan AnytimeStack finds by then."""
+    return AnytimeStack(program, mode, priority_category, budget, seed, on_progress).result()
@@ -0,0 +1,81 @@
+import math
+
+# ----------------------------------------
+# Typical blocks as (block type, count)
+# ----------------------------------------
+#
+# Typical blocks are mostly identical instances: same department, Block_Name,
+# SpaceMix, area and occupancy.  The typical phases group them into block
+# types once and decide per type and floor how many instances go there, so a
+# program of 40,000 workstations is a few hundred allocations.  The instance
+# records only ride along: place_many() files a batch of them on a floor with
+# one update of the floor's totals, and they come out one row per block at
+# export as before.
+
+TYPE_KEY = ['Department_Sub_Department', 'Block_Name', 'SpaceMix', 'Area_SQM', 'Max_Occupancy',
+            'Typical_Destination', 'Asset_Type']
+
+
+def block_types(blocks):
+    """[(template, instances)] of the identical blocks in blocks, in first-seen order."""
+    types = {}
+    for blk in blocks:
+        key = tuple(blk.get(k) for k in TYPE_KEY)
+        if key not in types:
+            types[key] = (blk, [])
+        types[key][1].append(blk)
+    return list(types.values())
+
+
+def fit_count(info, area, capacity):
+    """Instances of a block type a floor's remaining area and capacity still hold."""
+    n = math.inf
+    if area > 0:
+        n = max(int(info['remaining_area'] // area), 0)
+    if capacity > 0:
+        n = min(n, max(int(info['remaining_capacity'] // capacity), 0))
+    return n
+
+
+def water_fill(count, options):
+    """
+    Spreads count identical blocks the way placing them one at a time on the
+    lowest-scoring floor would.  options is [(floor, score, step, limit)]: a
+    floor's score rises by step with every block it gets, up to limit blocks.
+    Returns {floor: blocks}.
+    """
+    options = [(fl, score, step, min(limit, count)) for fl, score, step, limit in options if limit > 0]
+    if count <= 0 or not options:
+        return {}
+    if count >= sum(o[3] for o in options):
+        return {fl: limit for fl, _, _, limit in options}
+
+    def filled(level):
+        # blocks every floor takes while its score is still at most level
+        alloc = {}
+        for fl, score, step, limit in options:
+            if score <= level:
+                alloc[fl] = limit if step <= 0 else min(limit, int((level - score) // step) + 1)
+        return alloc
+
+    # bisect for the lowest level at which the floors take count blocks
+    lo = min(o[1] for o in options) - 1
+    hi = max(o[1] + max(o[2], 0) * o[3] for o in options)
+    for _ in range(100):
+        mid = (lo + hi) / 2
+        if sum(filled(mid).values()) >= count:
+            hi = mid
+        else:
+            lo = mid
+    alloc = filled(hi)
+
+    # floors tied at that level took blocks too many; the later floor gives them back
+    excess = sum(alloc.values()) - count
+    position = {o[0]: (i, o[1], o[2]) for i, o in enumerate(options)}
+    while excess > 0:
+        fl = max((f for f in alloc if alloc[f]),
+                 key=lambda f: (position[f][1] + position[f][2] * (alloc[f] - 1), position[f][0]))
+        give = 1 if position[fl][2] > 0 else min(excess, alloc[fl])
+        alloc[fl] -= give
+        excess -= give
+    return {fl: n for fl, n in alloc.items() if n > 0}
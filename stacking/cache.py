@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# Content-addressed result cache
+# ----------------------------------------
+#
+# run_stack_plan(..., cache=ResultCache()) returns the four output tables of
+# an identical earlier run straight from disk.  The key is a hash of the
+# normalised program tables (floors, blocks, department split rules,
+# adjacency, De-Centralized Logic), the case configuration, the mode, the
+# priority category and the seed; runs without a seed are random and are
+# never cached.  Every entry is a folder of four tables, each a JSON header
+# of column names and one .npy array per column: numeric, boolean and date
+# columns as they are, any other column as the JSON text of its cells.
+# Arrays are read back with allow_pickle=False, so an entry never runs
+# code.  An entry that cannot be read is a miss and is removed.  When the
+# cache grows past max_bytes the least recently used entries are removed.
+
+TABLES = ['detailed', 'floor_summary', 'space_mix', 'unassigned']
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'stacking')
+
+
+def _table_digest(digest, df):
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    if len(df):
+        try:
+            hashed = pd.util.hash_pandas_object(df, index=False)
+        except TypeError:  # unhashable cells
+            hashed = pd.util.hash_pandas_object(df.astype(str), index=False)
+        digest.update(hashed.values.tobytes())
+
+
+def program_fingerprint(program):
+    """Hash of everything in a program dict that stacking reads."""
+    digest = hashlib.sha256()
+    _table_digest(digest, program['floors'])
+    _table_digest(digest, program['blocks'])
+    adjacency = program['adjacency']
+    _table_digest(digest, adjacency.reset_index() if not adjacency.empty else adjacency)
+    digest.update(json.dumps([program['dept_splittable'], program['dept_min_pct'], program['decentral_add'],
+                              program['config']], sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+_NATIVE_KINDS = 'biufcmM'  # dtype kinds np.save stores without pickling
+
+
+def _json_cell(value):
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+
+class ResultCache:
+    """On-disk cache of run_stack_plan() results, evicting least recently used entries past max_bytes."""
+
+    def __init__(self, path=None, max_bytes=512 * 2 ** 20):
+        self.path = path or os.environ.get('STACKING_CACHE', DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def key(self, program, mode, priority_category, seed):
+        """Cache key of a run, or None for unseeded (random) runs."""
+        if seed is None:
+            return None
+        run = json.dumps([mode, priority_category, seed], default=str).encode()
+        return hashlib.sha256(program_fingerprint(program).encode() + run).hexdigest()
+
+    def get(self, key):
+        """The four tables stored under key, or None."""
+        if key is None:
+            return None
+        entry = os.path.join(self.path, key)
+        if not os.path.isdir(entry):
+            return None
+        try:
+            tables = tuple(self._read(os.path.join(entry, name)) for name in TABLES)
+        except Exception:  # missing, truncated or foreign files: a miss
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        os.utime(entry)  # most recently used
+        return tables
+
+    def put(self, key, tables):
+        """Stores the four tables under key, then evicts old entries past max_bytes."""
+        if key is None:
+            return
+        tmp = os.path.join(self.path, f'.{key}.{uuid.uuid4().hex}')
+        os.makedirs(tmp)
+        for name, df in zip(TABLES, tables):
+            self._write(df, os.path.join(tmp, name))
+        try:
+            os.replace(tmp, os.path.join(self.path, key))
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # another process stored the same run
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry))
+            entries.append((os.stat(entry).st_mtime, size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path, exist_ok=True)
+
+    def _write(self, df, base):
+        kinds = []
+        for i, column in enumerate(df.columns):
+            values = df[column].to_numpy()
+            if values.dtype.kind in _NATIVE_KINDS:
+                kinds.append('array')
+            else:
+                kinds.append('json')
+                values = np.array([json.dumps(v, default=_json_cell) for v in values], dtype=str)
+            np.save(f'{base}.{i}.npy', values, allow_pickle=False)
+        with open(base + '.json', 'w') as f:
+            json.dump({'columns': [str(c) for c in df.columns], 'kinds': kinds}, f)
+
+    def _read(self, base):
+        with open(base + '.json') as f:
+            header = json.load(f)
+        columns = {}
+        for i, (column, kind) in enumerate(zip(header['columns'], header['kinds'])):
+            values = np.load(f'{base}.{i}.npy', allow_pickle=False)
+            columns[column] = values if kind == 'array' else [json.loads(v) for v in values]
+        return pd.DataFrame(columns, columns=header['columns'])
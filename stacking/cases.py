@@ -0,0 +1,107 @@
+import copy
+
+# ----------------------------------------
+# Case variants as configuration
+# ----------------------------------------
+#
+# The case scripts (AR1, BR1, CR1, DR1, AAR1, BAR1, New_AR, New_BR) differ in
+# sheet names, in which rows count as destination blocks and in the phases
+# they run.  Each case is a set of overrides on DEFAULT_CONFIG; column
+# spellings are handled by stacking.schema and need no entry here.
+#
+#   phases              names from stacking.phases.PHASES, run in order; every
+#                       case starts with 'immovable' so Level-bound blocks are
+#                       placed or reported unassigned
+#                       (typical_flow, from stacking.flow, and typical_hierarchical,
+#                       from stacking.hierarchy, can replace typical_by_category
+#                       or typical_fill)
+#   destination_values  Typical_Destination values placed as destination groups
+#   check_adjacency     skip floors a hard adjacency forbid (-1) rules out
+#   shuffle_groups      place destination groups in random order
+#   floor_order         'level' sorts floors by the level number in their name,
+#                       'sheet' keeps the order of the floor sheet
+#   space_weight        floors of vertical distance a completely free floor is
+#                       worth when a block picks its floor (see plan.floors_for)
+#   bu_separator        ends the business unit part of a department key
+#                       ('BU1_Finance' is in business unit 'BU1')
+#   workers             processes typical_hierarchical solves business units in
+#   physical_constraints  [(Block_Name regex, ['lowest' / 'mid' / 'highest'])] for
+#                       the 'physical' phase (New_AR's Phase 0): matching blocks
+#                       go first on the first of those floors they fit
+
+MODES = ['centralized', 'semi', 'decentralized']
+PRIORITY_CATEGORIES = ['ME', 'WE', 'US', 'Support']
+
+DEFAULT_CONFIG = {
+    'sheets': {
+        'floors': 'Program Table Input 2 - Floor',
+        'blocks': 'Program Table Input 1 - Block',
+        'department_split': 'Department Split',
+        'logic': 'De-Centralized Logic',
+        'min_split': 'Min % Split',
+    },
+    'destination_values': ['Destination', 'both'],
+    'base_destination_floors': 2,
+    'phases': ['immovable', 'destination', 'typical_by_category'],
+    'check_adjacency': True,
+    'shuffle_groups': True,
+    'floor_order': 'level',
+    'space_weight': 2.0,
+    'bu_separator': '_',
+    'workers': 1,
+    'physical_constraints': [],
+}
+
+# New_AR / New_BR define_physical_constraints(): executive blocks on the top
+# floor, reception on the lowest (a block matching both counts as executive)
+NEW_BUILD_PHYSICAL_CONSTRAINTS = [
+    ('Executive|VIP|CEO|Director', ['highest']),
+    ('Reception', ['lowest']),
+]
+
+CASES = {
+    'AR': {},
+    'BR': {},
+    'CR': {},
+    'New_AR': {
+        'phases': ['immovable', 'physical', 'destination', 'typical_by_category'],
+        'physical_constraints': NEW_BUILD_PHYSICAL_CONSTRAINTS,
+    },
+    'New_BR': {
+        'phases': ['immovable', 'physical', 'destination', 'typical_by_category'],
+        'physical_constraints': NEW_BUILD_PHYSICAL_CONSTRAINTS,
+    },
+    'DR': {
+        'sheets': {'blocks': 'Existing Program Table Input 1.'},
+        'phases': ['immovable', 'destination', 'typical_fill'],
+        'check_adjacency': False,
+        'shuffle_groups': False,
+    },
+    'BAR': {
+        'sheets': {'blocks': 'Existing Program Table Input 1.'},
+        'phases': ['immovable', 'destination', 'typical_fill'],
+    },
+    'AAR': {
+        'sheets': {'blocks': 'RenovationProgram Table Input 1'},
+        'destination_values': ['Destination'],
+        'phases': ['immovable', 'destination', 'department_split', 'typical_by_category',
+                   'retry_unassigned'],
+    },
+}
+
+
+def case_config(case=None, **overrides):
+    """
+    Configuration of a named case (see CASES) with keyword overrides applied.
+    'sheets' overrides are merged with the case's sheet names.
+    """
+    if case is not None and case not in CASES:
+        raise ValueError(f"Unknown case '{case}', expected one of {sorted(CASES)}")
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    for layer in (CASES.get(case, {}), overrides):
+        for key, value in layer.items():
+            if key == 'sheets':
+                config['sheets'].update(value)
+            else:
+                config[key] = copy.deepcopy(value)
+    return config
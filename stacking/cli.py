@@ -0,0 +1,171 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cases import CASES, MODES, PRIORITY_CATEGORIES, case_config
+from .engine import stack
+from .inputs import load_program
+from .outputs import build_reports, write_plan
+from .pareto import explore
+from .precheck import precheck
+
+# ----------------------------------------
+# Batch runner: stack a portfolio of buildings from the command line
+# ----------------------------------------
+#
+#   python -m stacking "inputs/*.xlsx" --case AR --out plans/ --workers 4
+#
+# Every workbook gets its own folder of plans under --out, named after the
+# workbook and a short hash of its full path.  A manifest in
+# --out records the hash of each workbook together with the run settings;
+# a building whose workbook and settings are unchanged since the last run is
+# skipped unless --force is given.  With --explore N every building also
+# gets pareto_front.csv, the Pareto front of N sampled strategies.
+# With --max-unassigned AREA every building is prechecked first (precheck.csv)
+# and modes whose guaranteed unassigned area exceeds AREA are not stacked.
+
+MANIFEST = 'stacking_manifest.json'
+
+
+def expand_inputs(patterns):
+    """Workbook paths from files, directories (every .xlsx inside) and glob patterns."""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '*.xlsx'))
+        else:
+            matches = glob.glob(pattern)
+        paths += [p for p in sorted(matches) if not os.path.basename(p).startswith('~$')]
+    return list(dict.fromkeys(paths))
+
+
+def run_hash(path, settings):
+    """Hash of a workbook's bytes and the settings it is stacked with."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(out_dir, manifest):
+    tmp = os.path.join(out_dir, MANIFEST + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, os.path.join(out_dir, MANIFEST))
+
+
+def building_dir(out_dir, path):
+    """out_dir/<workbook name>-<hash of its resolved path>: same-named workbooks never share a folder."""
+    tag = hashlib.sha256(os.path.realpath(path).encode()).hexdigest()[:8]
+    return os.path.join(out_dir, f'{os.path.splitext(os.path.basename(path))[0]}-{tag}')
+
+
+def stack_building(path, settings, out_dir):
+    """Stacks one workbook for every mode and category; returns the files written."""
+    program = load_program(path, settings['config'])
+    target = building_dir(out_dir, path)
+    os.makedirs(target, exist_ok=True)
+    written = []
+    modes = settings['modes']
+    if settings.get('max_unassigned') is not None:
+        bounds = precheck(program, modes)
+        filename = os.path.join(target, 'precheck.csv')
+        bounds.to_csv(filename, index=False)
+        written.append(filename)
+        modes = list(bounds.loc[bounds['Unassigned_Area_LB'] <= settings['max_unassigned'], 'Mode'])
+    for mode in modes:
+        for category in settings['categories']:
+            detailed, unassigned, reports = build_reports(stack(program, mode, category, settings['seed']))
+            filename = os.path.join(target, f'stack_plan_{mode}_{category}_priority.xlsx')
+            write_plan(filename, detailed, reports.floor_summary, reports.space_mix, unassigned,
+                       reports.typical_summary)
+            written.append(filename)
+    if settings.get('explore'):
+        filename = os.path.join(target, 'pareto_front.csv')
+        explore(program, settings['explore'], settings['modes'], settings['categories'],
+                seed=settings['seed'], workers=1).to_csv(filename, index=False)
+        written.append(filename)
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m stacking',
+                                     description='Stack every building of a portfolio of program workbooks.')
+    parser.add_argument('inputs', nargs='+', help='workbooks, directories or glob patterns')
+    parser.add_argument('--case', choices=sorted(CASES), default=None,
+                        help='case configuration (default: the AR/BR layout)')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--categories', nargs='+', default=PRIORITY_CATEGORIES,
+                        help='priority categories (ME WE US Support)')
+    parser.add_argument('--out', default='stack_plans', help='output directory')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='buildings stacked at once (default: CPU count)')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='re-stack unchanged buildings too')
+    parser.add_argument('--explore', type=int, default=0, metavar='N',
+                        help='also write the Pareto front of N sampled strategies per building')
+    parser.add_argument('--max-unassigned', type=float, default=None, metavar='AREA',
+                        help='skip modes whose LP precheck proves more than AREA m2 stays unassigned')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No workbooks matched the inputs.")
+        return 1
+    os.makedirs(args.out, exist_ok=True)
+    settings = {
+        'config': case_config(args.case),
+        'modes': args.modes,
+        'categories': args.categories,
+        'seed': args.seed,
+        'explore': args.explore,
+        'max_unassigned': args.max_unassigned,
+    }
+
+    manifest = load_manifest(args.out)
+    todo = {}
+    for path in paths:
+        key = os.path.abspath(path)
+        digest = run_hash(path, settings)
+        if not args.force and manifest.get(key) == digest and os.path.isdir(building_dir(args.out, path)):
+            print(f"= {path} unchanged, skipped")
+        else:
+            todo[path] = digest
+
+    failed = 0
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(todo) or 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(stack_building, path, settings, args.out): path for path in todo}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                written = future.result()
+            except Exception as e:
+                failed += 1
+                manifest.pop(os.path.abspath(path), None)
+                print(f"✗ {path}: {e}")
+                continue
+            manifest[os.path.abspath(path)] = todo[path]
+            save_manifest(args.out, manifest)
+            print(f"✔ {path}: {len(written)} plans")
+
+    save_manifest(args.out, manifest)
+    print(f"Stacked {len(todo) - failed} of {len(paths)} buildings "
+          f"({len(paths) - len(todo)} unchanged, {failed} failed).")
+    return 1 if failed else 0
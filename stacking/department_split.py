@@ -0,0 +1,95 @@
+import pandas as pd
+
+from .subset_sum import largest_subset
+
+# ----------------------------------------
+# Department-level waterfall split (AAR1 Phase 2A)
+# ----------------------------------------
+#
+# Splittable == 1 keeps a department on one floor; any other value except -1
+# lets it waterfall over several floors, each floor holding at least
+# Min_%_of_Block_per_department of the department's area.  The split of a
+# department is decided in one pass (a subset-sum knapsack per floor) rather
+# than by trying its blocks one at a time.  The workbooks store the minimum
+# as a fraction (0.25, 1.0); values above 1 are read as percentages.
+# allocate_departments() is the AAR1 notebook's Phase 2A over its own floor
+# state: it asks for each department's floors and hands back the placements.
+
+
+def waterfall_split(blocks, floor_space, min_pct, keep_together, resolution=1.0, max_tries=64,
+                    area_key='Area_SQM', capacity_key='Max_Occupancy'):
+    """
+    Divides a department's blocks over floors.  floor_space is a list of
+    (floor, remaining_area, remaining_capacity) in order of preference.
+    Returns [(floor, [blocks])] covering every block, or None if no split
+    satisfies the rules.
+    """
+    areas = [b[area_key] for b in blocks]
+    caps = [b[capacity_key] for b in blocks]
+    total_a, total_c = sum(areas), sum(caps)
+
+    if keep_together:
+        # best fit: the tightest floor the whole department fits on
+        fitting = [f for f in floor_space if f[1] >= total_a and f[2] >= total_c]
+        return [(min(fitting, key=lambda f: f[1])[0], blocks)] if fitting else None
+
+    min_area = min_pct * total_a
+    left = list(range(len(blocks)))
+    pieces = []
+    for fl, area_left, cap_left in floor_space:
+        if not left:
+            break
+        left_a = sum(areas[i] for i in left)
+        left_c = sum(caps[i] for i in left)
+        if area_left >= left_a and cap_left >= left_c:
+            pieces.append((fl, left))
+            left = []
+            break
+        # largest piece that fits the floor, meets the minimum and leaves a
+        # remainder that can still meet it
+        def accept(piece):
+            piece_a = sum(areas[left[j]] for j in piece)
+            if piece_a < min_area:
+                return None  # smaller sums only get further below the minimum
+            return left_a - piece_a >= min_area and sum(caps[left[j]] for j in piece) <= cap_left
+
+        chosen = largest_subset([areas[i] for i in left], area_left, accept, resolution, max_tries)
+        if chosen:
+            taken = set(chosen)
+            pieces.append((fl, [left[j] for j in chosen]))
+            left = [i for j, i in enumerate(left) if j not in taken]
+    if left:
+        return None
+    return [(fl, [blocks[i] for i in idx]) for fl, idx in pieces]
+
+
+def min_share(dept_min_pct, dept):
+    """
+    Minimum share (0..1) of a department's area per floor: a fraction as the
+    sheets store it, or a percentage when above 1; missing means keep it whole.
+    """
+    pct = pd.to_numeric(dept_min_pct.get(dept, 1.0), errors='coerce')
+    if pd.isna(pct):
+        return 1.0
+    return min(max(pct / 100.0 if pct > 1 else pct, 0.0), 1.0)
+
+
+def allocate_departments(dept_groups, floor_space, dept_splittable, dept_min_pct, place,
+                         area_key='Area_SQM', capacity_key='Max_Occupancy'):
+    """
+    One waterfall_split() per department of dept_groups {dept: [blocks]}.
+    floor_space(dept) gives the floors the department may use as
+    waterfall_split() takes them; place(floor, block) puts a block down.
+    Returns the blocks of the departments that could not be allocated.
+    """
+    unplaced = []
+    for dept, blocks in dept_groups.items():
+        split = waterfall_split(blocks, floor_space(dept), min_share(dept_min_pct, dept),
+                                dept_splittable.get(dept, -1) == 1, area_key=area_key, capacity_key=capacity_key)
+        if split is None:
+            unplaced.extend(blocks)
+            continue
+        for fl, piece in split:
+            for blk in piece:
+                place(fl, blk)
+    return unplaced
@@ -0,0 +1,66 @@
+from .cases import MODES, PRIORITY_CATEGORIES
+from .outputs import build_outputs
+from .phases import PHASES
+from .plan import new_plan
+from .rejections import reject
+
+# ----------------------------------------
+# Stacking driver: one run_stack_plan for every case
+# ----------------------------------------
+
+
+def stack(program, mode='centralized', priority_category='ME', seed=None, phases=None):
+    """
+    Runs the case's phases (or the given phase names) on a fresh plan and
+    returns the finished plan dict.  Blocks no phase placed or rejected
+    (typical blocks left pending, or kinds the phase list never visits) end
+    up unassigned, so every block is in exactly one of the two.  Why each
+    unassigned block is unplaced is in plan['rejections'], recorded by the
+    phase that gave up on it (rejections.reject).
+    """
+    plan = new_plan(program, mode, priority_category, seed)
+    for name in phases or program['config']['phases']:
+        if name not in PHASES:
+            raise ValueError(f"Unknown phase '{name}', expected one of {sorted(PHASES)}")
+        PHASES[name](plan)
+    leftover, plan['pending_typical'] = plan['pending_typical'], []
+    seen = {blk['Block_Index'] for info in plan['assignments'].values() for blk in info['assigned_blocks']}
+    seen.update(blk['Block_Index'] for blk in plan['unassigned'] + leftover)
+    blocks = program['blocks']
+    reject(plan, leftover + blocks[~blocks['Block_Index'].isin(seen)].to_dict('records'))
+    return plan
+
+
+def run_stack_plan(program, mode='centralized', priority_category='ME', seed=None, cache=None):
+    """
+    mode: 'centralized', 'semi' or 'decentralized'
+    priority_category: 'ME', 'WE', 'US' or 'Support', placed first by typical_by_category
+                       (or a list of categories, placed first in that order)
+    cache: a stacking.cache.ResultCache; seeded runs already in it are not recomputed
+    Returns detailed_df, floor_summary_df, space_mix_df, unassigned_df.
+    """
+    key = cache.key(program, mode, priority_category, seed) if cache is not None else None
+    if key is not None:
+        tables = cache.get(key)
+        if tables is not None:
+            return tables
+    tables = build_outputs(stack(program, mode, priority_category, seed))
+    if key is not None:
+        cache.put(key, tables)
+    return tables
+
+
+def run_all(program, modes=None, categories=None, seed=None, cache=None):
+    """all_plans[mode][category] = {'detailed', 'floor_summary', 'space_mix', 'unassigned'}."""
+    all_plans = {}
+    for mode in modes or MODES:
+        all_plans[mode] = {}
+        for category in categories or PRIORITY_CATEGORIES:
+            detailed, floor_sum, space_mix, unassigned = run_stack_plan(program, mode, category, seed, cache)
+            all_plans[mode][category] = {
+                'detailed': detailed,
+                'floor_summary': floor_sum,
+                'space_mix': space_mix,
+                'unassigned': unassigned,
+            }
+    return all_plans
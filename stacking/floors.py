@@ -0,0 +1,151 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ----------------------------------------
+# Floor model: level order and vertical distance
+# ----------------------------------------
+#
+# The case scripts take floors in sheet order, and New_AR's get_floor_levels
+# sorts floor names as text, so 'L10' comes before 'L2'.  Here every floor
+# name is read as a level number (basements below ground, ground 0) and
+# floors are put in level order.  The distance between two floors is the
+# number of floors between them in that order, kept in one matrix that is
+# built once per program, so placement can keep the floors of a department
+# close together with a single lookup per candidate floor.
+# Office towers repeat the same floor plate many times; floor_classes()
+# groups such identical floors so solvers can treat a class as one floor
+# with a count and expand to concrete floors at the end (split_evenly).
+#
+# Immovable blocks name their floor in a free-text Level column.  DR.py
+# matched it against floor names with the 'L001' prefix cut off, AAR1 took
+# the first floor whose name contains it ('L1' also matches 'L10').
+# floor_registry() is built once per program and indexes every floor under
+# its name, its name without the prefix and its level code; a Level is then
+# one dictionary lookup, exact or none.  Level numbers shared by several
+# floors are left out of the index rather than guessed.
+
+_BASEMENT = re.compile(r'^(?:B|Basement\s*|LG)(\d*)\b', re.IGNORECASE)
+_GROUND = re.compile(r'^(?:G|GF|Ground(?:\s*Floor)?)\b', re.IGNORECASE)
+_NUMBER = re.compile(r'\d+')
+_LEVEL_PREFIX = re.compile(r'^L\d{3}')
+
+
+def level_number(name):
+    """Level of a floor name ('L010' -> 10, 'Level 2' -> 2, 'Ground' -> 0, 'B2' -> -2), or None."""
+    name = str(name).strip()
+    if _GROUND.match(name):
+        return 0
+    basement = _BASEMENT.match(name)
+    if basement:
+        return -int(basement.group(1) or 1)
+    number = _NUMBER.search(name)
+    return int(number.group()) if number else None
+
+
+def _alias(text):
+    return ' '.join(str(text).lower().split())
+
+
+def floor_registry(names):
+    """
+    {'levels': {floor: level number or None}, 'aliases': {alias: floor}} of
+    the floor names.  Aliases are the lower-cased name, the name without an
+    'L001' style prefix and ('level', number) for level numbers only one floor has.
+    """
+    names = [str(name).strip() for name in names]
+    levels = {name: level_number(name) for name in names}
+    aliases = {}
+    for name in names:
+        aliases.setdefault(_alias(name), name)
+    for name in names:
+        aliases.setdefault(_alias(_LEVEL_PREFIX.sub('', name)), name)
+    counts = pd.Series(list(levels.values()), dtype=object).value_counts()
+    for name, level in levels.items():
+        if level is not None and counts[level] == 1:
+            aliases[('level', level)] = name
+    return {'levels': levels, 'aliases': aliases}
+
+
+def match_level(registry, level):
+    """Floor a block's Level names: its exact name or prefix-free name, else its level code; or None."""
+    level = str(level).strip()
+    if not level or level.lower() == 'nan':
+        return None
+    aliases = registry['aliases']
+    fl = aliases.get(_alias(level))
+    if fl is None:
+        number = level_number(level)
+        fl = aliases.get(('level', number)) if number is not None else None
+    return fl
+
+
+def order_floors(floor_df):
+    """Floor rows in level order; floors without a level number go on top in sheet order."""
+    levels = floor_df['Name'].astype(str).str.strip().map(floor_registry(floor_df['Name'])['levels'])
+    key = pd.DataFrame({'unnumbered': levels.isna(), 'level': levels.fillna(0),
+                        'row': np.arange(len(floor_df))}, index=floor_df.index)
+    return floor_df.loc[key.sort_values(['unnumbered', 'level', 'row']).index].reset_index(drop=True)
+
+
+def floor_classes(floor_df):
+    """
+    Floors that are interchangeable on paper: lists of floor names with the
+    same Usable_Area and Max_Capacity, in floor order.
+    """
+    classes = {}
+    for name, area, capacity in zip(floor_df['Name'], floor_df['Usable_Area'], floor_df['Max_Capacity']):
+        classes.setdefault((area, capacity), []).append(name)
+    return list(classes.values())
+
+
+def split_evenly(count, members, start=0):
+    """
+    {floor: blocks} spreading count blocks as evenly as possible over
+    members; the floors from position start (wrapping round) take the
+    remainder.
+    """
+    base, extra = divmod(count, len(members))
+    m = len(members)
+    return {members[(start + i) % m]: base + (1 if i < extra else 0) for i in range(m)}
+
+
+def floor_distance(floors):
+    """(floor_index, matrix): floor -> position, and the floors-apart distance of every pair."""
+    position = np.arange(len(floors))
+    return {fl: i for i, fl in enumerate(floors)}, np.abs(position[:, None] - position[None, :])
+
+
+def distance_to(plan, floors, fl):
+    """Floors between fl and the nearest of floors (0 if floors is empty)."""
+    if not floors:
+        return 0
+    index = plan['program']['floor_index']
+    row = plan['program']['floor_distance'][index[fl]]
+    return min(row[index[g]] for g in floors)
+
+
+def dept_distance(plan, dept, fl):
+    """Floors between fl and the nearest floor dept already occupies (0 if none yet)."""
+    return distance_to(plan, plan['dept_floors'].get(dept), fl)
+
+
+def floor_spread(floor_index, floors):
+    """Floors between the lowest and the highest of floors."""
+    positions = [floor_index[fl] for fl in floors]
+    return max(positions) - min(positions) if positions else 0
+
+
+def vertical_spread(plan):
+    """
+    Departments on more than one floor with their floor count and spread
+    (floors between the lowest and highest floor they occupy).
+    """
+    index = plan['program']['floor_index']
+    rows = []
+    for dept, on_floors in plan['dept_floors'].items():
+        if len(on_floors) > 1:
+            rows.append({'Department_Sub_Department': dept, 'Floors': len(on_floors),
+                         'Spread': floor_spread(index, on_floors)})
+    return pd.DataFrame(rows, columns=['Department_Sub_Department', 'Floors', 'Spread'])
@@ -0,0 +1,159 @@
+import numpy as np
+
+from .block_types import block_types, fit_count
+from .phases import category_order, fill_type, floor_targets, register_phase
+from .floors import split_evenly
+from .plan import allowed, floor_state_classes, place_many
+from .rejections import reject
+
+# ----------------------------------------
+# Transportation model for typical blocks
+# ----------------------------------------
+#
+# typical_by_category gives every floor a proportional quota of each block
+# type and sends whatever the floor cannot hold straight to unassigned.
+# The 'typical_flow' phase instead solves one transportation problem over
+# all typical block types at once:
+#
+#   sources   block types, supplying their instance count
+#   sinks     floors, limited by remaining area and remaining capacity
+#   arcs      type -> floor where the type is allowed; the first
+#             target(type, floor) blocks cost nothing extra, blocks above
+#             the proportional target cost a small deviation penalty
+#   slack     type -> unassigned, costing the type's area weighted by its
+#             priority category (priority category first costs most)
+#
+# Two resources per floor (area and occupancy) make this a linear program
+# rather than a pure network flow, so it is solved with scipy's HiGHS
+# (polynomial, milliseconds for hundreds of types).  The solution is rounded
+# down per type and floor, and the rounded-off blocks go through fill_type(),
+# so no block is left unassigned while some floor can still take it.
+# Types of keep-together departments (Splittable == 1) skip the model and go
+# straight to fill_type(), which keeps them on one floor.
+# Identical floors in the same state (plan.floor_state_classes) are one sink
+# with their summed area and capacity, so a tower of repeated floor plates
+# is a handful of sinks; class counts are spread evenly over the floors of
+# the class afterwards.
+
+DEVIATION_PENALTY = 0.1
+
+
+def _category_weights(plan):
+    order = category_order(plan['priority_category'])
+    return {cat: 2.0 ** (len(order) - 1 - rank) for rank, cat in enumerate(order)}
+
+
+def solve_transport(types, sinks, space, capacity, targets, allowed_arcs, weights):
+    """
+    Block counts per (type, sink) of the transportation LP (see the module
+    comment).  types is [(template, count)]; sinks are floors or classes of
+    identical floors, with space/capacity their total remaining area and
+    capacity; targets[t][k] the proportional targets; allowed_arcs[t] the
+    sink indexes type t may use; weights[t] its unassigned cost per m2.
+    Returns an array counts[t, k] (fractional).
+    """
+    try:
+        from scipy.optimize import linprog
+        from scipy.sparse import coo_matrix
+    except ImportError:
+        raise ImportError("The typical_flow phase needs scipy (pip install scipy)")
+
+    n_types, n_sinks = len(types), len(sinks)
+    arcs = [(t, k) for t in range(n_types) for k in allowed_arcs[t]]
+    n_arcs = len(arcs)
+    # variables: within-target arcs, above-target arcs, then one slack per type
+    n_vars = 2 * n_arcs + n_types
+    cost = np.zeros(n_vars)
+    upper = np.full(n_vars, np.inf)
+    rows, cols, vals = [], [], []
+    ub_rows, ub_cols, ub_vals = [], [], []
+    for j, (t, k) in enumerate(arcs):
+        template = types[t][0]
+        cost[n_arcs + j] = DEVIATION_PENALTY * template['Area_SQM']
+        upper[j] = targets[t][k]
+        for var in (j, n_arcs + j):
+            rows.append(t)
+            cols.append(var)
+            vals.append(1.0)
+            ub_rows += [k, n_sinks + k]
+            ub_cols += [var, var]
+            ub_vals += [template['Area_SQM'], template['Max_Occupancy']]
+    for t, (template, count) in enumerate(types):
+        cost[2 * n_arcs + t] = weights[t] * max(template['Area_SQM'], 1e-6)
+        rows.append(t)
+        cols.append(2 * n_arcs + t)
+        vals.append(1.0)
+
+    a_eq = coo_matrix((vals, (rows, cols)), shape=(n_types, n_vars)).tocsr()
+    b_eq = np.array([count for _, count in types], dtype=float)
+    a_ub = coo_matrix((ub_vals, (ub_rows, ub_cols)), shape=(2 * n_sinks, n_vars)).tocsr()
+    b_ub = np.concatenate([np.maximum(space, 0), np.maximum(capacity, 0)])
+    result = linprog(cost, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=b_eq,
+                     bounds=np.column_stack([np.zeros(n_vars), upper]), method='highs')
+    if result.status != 0:
+        raise ValueError(f"typical_flow: the transportation model failed ({result.message})")
+    counts = np.zeros((n_types, n_sinks))
+    for j, (t, k) in enumerate(arcs):
+        counts[t, k] = result.x[j] + result.x[n_arcs + j]
+    return counts
+
+
+@register_phase('typical_flow')
+def place_typical_flow(plan):
+    """Typical blocks of the SpaceMix categories by the transportation model (see the module comment)."""
+    floors = plan['floors']
+    order = category_order(plan['priority_category'])
+    pending, rest = [], []
+    for blk in plan['pending_typical']:
+        (pending if str(blk['SpaceMix']).strip() in order else rest).append(blk)
+    plan['pending_typical'] = rest
+
+    splittable = plan['program']['dept_splittable']
+    types, keep_together = [], []
+    for template, instances in block_types(pending):
+        if splittable.get(template.get('Department_Sub_Department', ''), -1) == 1:
+            keep_together.append((template, instances))
+        else:
+            types.append((template, instances))
+    types.sort(key=lambda ti: order.index(str(ti[0]['SpaceMix']).strip()))
+
+    leftovers = []
+    if types:
+        # identical floors in the same state form one sink with a count
+        assignments = plan['assignments']
+        classes = floor_state_classes(plan)
+        space = np.array([assignments[c[0]]['remaining_area'] * len(c) for c in classes], dtype=float)
+        capacity = np.array([assignments[c[0]]['remaining_capacity'] * len(c) for c in classes], dtype=float)
+        avail = {fl: max(assignments[fl]['remaining_area'], 0) for fl in floors}
+        targets, allowed_arcs = [], []
+        for template, instances in types:
+            targ = floor_targets(len(instances), avail, floors) if sum(avail.values()) > 0 else {}
+            targets.append([sum(max(targ.get(fl, 0), 0) for fl in c) for c in classes])
+            allowed_arcs.append([k for k, c in enumerate(classes) if allowed(plan, template, c[0])])
+        category_weight = _category_weights(plan)
+        weights = [category_weight[str(template['SpaceMix']).strip()] for template, _ in types]
+        counts = solve_transport([(tmpl, len(inst)) for tmpl, inst in types], classes, space, capacity,
+                                 targets, allowed_arcs, weights)
+
+        # expand class counts to concrete floors, rotating which floors take the remainders
+        start = [0] * len(classes)
+        for t, (template, instances) in enumerate(types):
+            idx = 0
+            for k, members in enumerate(classes):
+                n = int(counts[t, k] + 1e-6)
+                if n <= 0:
+                    continue
+                for fl, m in split_evenly(n, members, start[k]).items():
+                    if m <= 0 or not allowed(plan, template, fl):
+                        continue
+                    m = min(m, len(instances) - idx,
+                            fit_count(assignments[fl], template['Area_SQM'], template['Max_Occupancy']))
+                    place_many(plan, fl, template, instances[idx:idx + m])
+                    idx += m
+                start[k] = (start[k] + n) % len(members)
+            leftovers.append((template, instances[idx:]))
+
+    # blocks rounded off the model (and keep-together types) take any floor that still fits them
+    for template, instances in leftovers + keep_together:
+        if instances:
+            reject(plan, fill_type(plan, template, instances))
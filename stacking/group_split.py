@@ -0,0 +1,73 @@
+from .subset_sum import largest_subset
+
+# ----------------------------------------
+# Destination-group splitting
+# ----------------------------------------
+#
+# A destination group is meant to sit on one floor.  When no floor has room
+# for the whole group, the case scripts fall back to scattering its blocks
+# one at a time (New_AR's split_destination_groups_by_adjacency always hands
+# the group back whole), so large groups end up spread thin or unassigned.
+# split_group() instead cuts the group into the fewest floor-sized pieces:
+# the blocks are sorted by area once, and every floor of a candidate run of
+# floors takes the largest subset of the remaining blocks that fits it.
+# Runs of consecutive floors are tried, fewest floors first and starting with
+# runs on the mode's destination floors; the last run tried is the whole
+# building.
+
+
+def _fill(blocks, areas, caps, order, floor_space, resolution, max_tries):
+    """Pieces filling floor_space in turn from the blocks in order; None if blocks are left over."""
+    left = list(order)
+    pieces = []
+    for fl, area_left, cap_left in floor_space:
+        if not left:
+            break
+        if area_left >= sum(areas[i] for i in left) and cap_left >= sum(caps[i] for i in left):
+            chosen = range(len(left))
+        else:
+            chosen = largest_subset([areas[i] for i in left], area_left,
+                                    lambda piece: sum(caps[left[j]] for j in piece) <= cap_left,
+                                    resolution, max_tries)
+        if chosen:
+            taken = set(chosen)
+            pieces.append((fl, [blocks[left[j]] for j in sorted(taken)]))
+            left = [i for j, i in enumerate(left) if j not in taken]
+    return None if left else pieces
+
+
+def split_group(blocks, floor_space, preferred=0, resolution=1.0, max_tries=64):
+    """
+    Splits a group's blocks over the fewest floors.  floor_space is a list of
+    (floor, remaining_area, remaining_capacity) in building order, with zero
+    area on floors the group may not use; runs starting within the first
+    `preferred` floors are tried first.  Returns [(floor, [blocks])] covering
+    every block, or None if the blocks do not fit.
+    """
+    areas = [b['Area_SQM'] for b in blocks]
+    caps = [b['Max_Occupancy'] for b in blocks]
+    total_a, total_c = sum(areas), sum(caps)
+    order = sorted(range(len(blocks)), key=lambda i: areas[i], reverse=True)
+    if total_a > sum(f[1] for f in floor_space) or total_c > sum(f[2] for f in floor_space):
+        return None
+
+    # no k floors hold the group if even the k roomiest do not
+    space = sorted((f[1] for f in floor_space), reverse=True)
+    k, held = 0, 0.0
+    while held < total_a and k < len(space):
+        held += space[k]
+        k += 1
+
+    n = len(floor_space)
+    for size in range(max(k, 1), n + 1):
+        starts = sorted(range(n - size + 1), key=lambda s: (s >= preferred, s))
+        for s in starts:
+            run = floor_space[s:s + size]
+            if sum(f[1] for f in run) < total_a or sum(f[2] for f in run) < total_c:
+                continue
+            # roomiest floor of the run first, so the pieces stay few and large
+            run = sorted(run, key=lambda f: f[1], reverse=True)
+            pieces = _fill(blocks, areas, caps, order, run, resolution, max_tries)
+            if pieces:
+                return pieces
+    return None
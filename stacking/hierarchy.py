@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from .block_types import block_types, fit_count
+from .phases import fill_type, register_phase
+from .plan import allowed, place_many
+from .rejections import reject
+
+# ----------------------------------------
+# Hierarchical stacking: business unit -> department -> block
+# ----------------------------------------
+#
+# The other typical phases treat all typical blocks as one pool.  The
+# 'typical_hierarchical' phase splits the problem in three levels:
+#
+#   1  business units (the part of Department_Sub_Department before the first
+#      config['bu_separator'], as in the BU_Department_Sub-Department column)
+#      are stacked over the floors in level order, each taking a run of
+#      floor area the size of its typical blocks
+#   2  within each business unit's floors its departments are stacked the
+#      same way
+#   3  each department's block types are fitted into its share of every floor
+#
+# Demand beyond the free area is scaled down evenly.  Levels 2 and 3 of
+# different business units touch disjoint shares, so they are independent
+# subproblems: allocate_unit() is a pure function of a business unit's
+# shares and block types and runs in config['workers'] processes.  The
+# counts are then placed on the plan, where adjacency and keep-together
+# rules are checked; blocks a share could not hold (and types of
+# keep-together departments) go through fill_type().
+
+
+def business_unit(dept, separator='_'):
+    """Business unit of a department key: the text before the first separator."""
+    return str(dept).split(separator, 1)[0]
+
+
+def stack_shares(demands, supply):
+    """
+    Lays demands [(name, area)] one after the other over supply [(floor,
+    area)], scaled down evenly when they exceed it.  Returns {name: [(floor, area)]}.
+    """
+    total = sum(area for _, area in demands)
+    available = sum(area for _, area in supply)
+    scale = min(1.0, available / total) if total > 0 else 0.0
+    shares = {name: [] for name, _ in demands}
+    k, left = 0, supply[0][1] if supply else 0.0
+    for name, area in demands:
+        need = area * scale
+        while need > 1e-9 and k < len(supply):
+            take = min(need, left)
+            if take > 0:
+                shares[name].append((supply[k][0], take))
+            need -= take
+            left -= take
+            if left <= 1e-9:
+                k += 1
+                left = supply[k][1] if k < len(supply) else 0.0
+    return shares
+
+
+def allocate_unit(floors, departments):
+    """
+    Levels 2 and 3 for one business unit.  floors is [(floor, area,
+    capacity)] of its shares, departments [(dept, [(area, occupancy, count)])]
+    its block types.  Returns {(dept, type number): {floor: blocks}}.
+    """
+    shares = stack_shares([(dept, sum(a * n for a, _, n in types)) for dept, types in departments],
+                          [(fl, area) for fl, area, _ in floors])
+    capacity_rate = {fl: capacity / area if area > 0 else 0.0 for fl, area, capacity in floors}
+    counts = {}
+    for dept, types in departments:
+        space = {fl: {'remaining_area': area, 'remaining_capacity': area * capacity_rate[fl]}
+                 for fl, area in shares[dept]}
+        for t in sorted(range(len(types)), key=lambda t: types[t][0], reverse=True):
+            area, occupancy, count = types[t]
+            alloc = {}
+            for fl, info in space.items():
+                n = min(count, fit_count(info, area, occupancy))
+                if n > 0:
+                    alloc[fl] = n
+                    info['remaining_area'] -= n * area
+                    info['remaining_capacity'] -= n * occupancy
+                    count -= n
+                if count <= 0:
+                    break
+            counts[dept, t] = alloc
+    return counts
+
+
+@register_phase('typical_hierarchical')
+def place_typical_hierarchical(plan):
+    """All pending typical blocks by business unit, then department, then block (see the module comment)."""
+    config = plan['config']
+    separator = config['bu_separator']
+    splittable = plan['program']['dept_splittable']
+    assignments = plan['assignments']
+
+    units, keep_together = {}, []
+    for template, instances in block_types(plan['pending_typical']):
+        dept = template.get('Department_Sub_Department', '')
+        if splittable.get(dept, -1) == 1:
+            keep_together.append((template, instances))
+        else:
+            units.setdefault(business_unit(dept, separator), {}).setdefault(dept, []).append((template, instances))
+    plan['pending_typical'] = []
+
+    # level 1: business units over the free area, in floor order
+    supply = [(fl, max(assignments[fl]['remaining_area'], 0)) for fl in plan['floors']]
+    demands = [(bu, sum(t['Area_SQM'] * len(inst) for types in depts.values() for t, inst in types))
+               for bu, depts in units.items()]
+    unit_shares = stack_shares(demands, supply)
+    problems = []
+    for bu, depts in units.items():
+        floors = []
+        for fl, area in unit_shares[bu]:
+            free = assignments[fl]['remaining_area']
+            rate = max(assignments[fl]['remaining_capacity'], 0) / free if free > 0 else 0.0
+            floors.append((fl, area, area * rate))
+        problems.append((floors, [(dept, [(t['Area_SQM'], t['Max_Occupancy'], len(inst)) for t, inst in types])
+                                  for dept, types in depts.items()]))
+
+    # levels 2 and 3: one independent subproblem per business unit
+    workers = config['workers']
+    if workers and workers > 1 and len(problems) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(allocate_unit, *zip(*problems)))
+    else:
+        results = [allocate_unit(floors, departments) for floors, departments in problems]
+
+    leftovers = []
+    for depts, counts in zip(units.values(), results):
+        for dept, types in depts.items():
+            for t, (template, instances) in enumerate(types):
+                idx = 0
+                for fl, n in counts[dept, t].items():
+                    if not allowed(plan, template, fl):
+                        continue
+                    n = min(n, len(instances) - idx,
+                            fit_count(assignments[fl], template['Area_SQM'], template['Max_Occupancy']))
+                    place_many(plan, fl, template, instances[idx:idx + n])
+                    idx += n
+                leftovers.append((template, instances[idx:]))
+
+    for template, instances in leftovers + keep_together:
+        if instances:
+            reject(plan, fill_type(plan, template, instances))
@@ -0,0 +1,175 @@
+import pandas as pd
+
+from .cases import case_config
+from .floors import floor_classes, floor_distance, floor_registry, order_floors
+from .schema import (BLOCK_SCHEMA, DEPARTMENT_SPLIT_POSITIONS, DEPARTMENT_SPLIT_SCHEMA,
+                     FLOOR_POSITIONS, FLOOR_SCHEMA, column_key, normalize_columns)
+
+# ----------------------------------------
+# Program workbook -> program dict
+# ----------------------------------------
+#
+# load_program() reads one case workbook into a plain dict that every phase
+# works from:
+#
+#   floors             DataFrame: Name, Usable_Area, Max_Capacity, in level order
+#                      (sheet order with config['floor_order'] == 'sheet')
+#   floor_index        {floor: position in floors}
+#   floor_distance     matrix of floors-apart distances, indexed by floor_index
+#   floor_classes      lists of floors with the same Usable_Area and Max_Capacity
+#   blocks             DataFrame with the canonical BLOCK_SCHEMA columns and
+#                      Block_Index, the row number that identifies a block in saved plans
+#   dept_splittable    {department: Splittable}
+#   dept_min_pct       {department: minimum share per floor}, the Department Split
+#                      sheet's Min_%_of_Block overridden by the Min % Split sheet's
+#                      Min_%_of_Block_per_department (fractions, see department_split.py)
+#   adjacency          DataFrame, department x department weights
+#   dept_bit           {department: bit}, one bit per department of the adjacency sheet
+#   forbidden_mask     {department: bits of the departments it may not share a floor with}
+#   decentral_add      {'Centralised' / 'Semi Centralized' / 'DeCentralised': Add}
+#   config             the case configuration used
+
+LOGIC_SECTIONS = ['Centralised', 'Semi Centralized', 'DeCentralised']
+
+
+def find_sheet(sheet_names, wanted):
+    """Sheet name matching wanted exactly, then ignoring case/whitespace, then by prefix."""
+    if wanted in sheet_names:
+        return wanted
+    key = ''.join(wanted.split()).lower()
+    for name in sheet_names:
+        if ''.join(name.split()).lower() == key:
+            return name
+    for name in sheet_names:
+        if ''.join(name.split()).lower().startswith(key.rstrip('.')):
+            return name
+    return None
+
+
+def with_header_row(raw, token):
+    """
+    raw (a sheet read with header=None) with its first row holding a cell
+    whose column key contains token as the header, the rows above it dropped;
+    row 0 is the header when no row has one (the CR script's dynamic header).
+    """
+    row = next((i for i, values in enumerate(raw.itertuples(index=False))
+                if any(token in column_key(v) for v in values if pd.notna(v))), 0)
+    table = raw.iloc[row + 1:].reset_index(drop=True).infer_objects()
+    table.columns = [str(v).strip() if pd.notna(v) else f'Unnamed: {i}' for i, v in enumerate(raw.iloc[row])]
+    return table
+
+
+def parse_decentral_logic(df_logic):
+    """'Add' value of every section of the De-Centralized Logic sheet (0 if missing)."""
+    data = {}
+    current_section = None
+    for _, row in df_logic.iterrows():
+        first_cell = str(row[0]).strip() if pd.notna(row[0]) else ''
+        if first_cell in LOGIC_SECTIONS:
+            current_section = first_cell
+            data[current_section] = 0
+        elif current_section and 'Add' in first_cell and len(row) > 1:
+            data[current_section] = int(row[1]) if pd.notna(row[1]) else 0
+    for key in LOGIC_SECTIONS:
+        data.setdefault(key, 0)
+    return data
+
+
+def adjacency_bitsets(adjacency):
+    """dept_bit and forbidden_mask for the hard (-1) adjacency forbids."""
+    departments = dict.fromkeys(list(adjacency.index) + list(adjacency.columns))
+    dept_bit = {d: 1 << i for i, d in enumerate(departments)}
+    forbidden_mask = {}
+    for dept, row in adjacency.to_dict().items():
+        forbidden_mask[dept] = sum(dept_bit[other] for other, value in row.items() if value == -1)
+    return dept_bit, forbidden_mask
+
+
+def normalize_blocks(blocks):
+    """Block table with every canonical BLOCK_SCHEMA column present and text gaps filled."""
+    blocks = normalize_columns(blocks, BLOCK_SCHEMA, required=['Area_SQM'])
+    for column in [c for c, _ in BLOCK_SCHEMA]:
+        if column not in blocks.columns:
+            blocks[column] = 0 if column == 'Max_Occupancy' else ''
+    return blocks.fillna({c: '' for c in ['Department_Sub_Department', 'SpaceMix', 'Level',
+                                          'Typical_Destination', 'Asset_Type']})
+
+
+def build_program(floors, blocks, department_split=None, adjacency=None, decentral_add=None,
+                  config=None, min_split=None):
+    """Program dict from already loaded DataFrames (columns are normalised here)."""
+    config = config or case_config()
+    floors = normalize_columns(floors, FLOOR_SCHEMA, FLOOR_POSITIONS,
+                               required=['Name', 'Usable_Area', 'Max_Capacity'])
+    floors = floors[floors['Name'].notna() & (floors['Name'] != '')].reset_index(drop=True)
+    if config.get('floor_order', 'level') == 'level':
+        floors = order_floors(floors)
+    floor_index, distance = floor_distance(list(floors['Name']))
+    blocks = normalize_blocks(blocks).reset_index(drop=True)
+    blocks['Block_Index'] = range(len(blocks))
+
+    dept_splittable, dept_min_pct = {}, {}
+    if department_split is not None:
+        split = normalize_columns(department_split, DEPARTMENT_SPLIT_SCHEMA, DEPARTMENT_SPLIT_POSITIONS)
+        split = split[split['Department_Sub_Department'].notna()].set_index('Department_Sub_Department')
+        dept_splittable = split['Splittable'].to_dict() if 'Splittable' in split else {}
+        dept_min_pct = split['Min_Pct'].to_dict() if 'Min_Pct' in split else {}
+    if min_split is not None:
+        mins = normalize_columns(min_split, DEPARTMENT_SPLIT_SCHEMA)
+        if 'Min_Pct' in mins:
+            mins = mins[mins['Department_Sub_Department'].notna() & mins['Min_Pct'].notna()]
+            dept_min_pct.update(mins.set_index('Department_Sub_Department')['Min_Pct'].to_dict())
+
+    adjacency = adjacency if adjacency is not None else pd.DataFrame()
+    dept_bit, forbidden_mask = adjacency_bitsets(adjacency)
+    return {
+        'floors': floors,
+        'floor_index': floor_index,
+        'floor_distance': distance,
+        'floor_classes': floor_classes(floors),
+        'floor_registry': floor_registry(floors['Name']),
+        'blocks': blocks,
+        'dept_splittable': dept_splittable,
+        'dept_min_pct': dept_min_pct,
+        'adjacency': adjacency,
+        'dept_bit': dept_bit,
+        'forbidden_mask': forbidden_mask,
+        'decentral_add': decentral_add or {key: 0 for key in LOGIC_SECTIONS},
+        'config': config,
+    }
+
+
+def load_program(excel_path, config=None):
+    """Reads a case workbook into a program dict (see the module comment)."""
+    config = config or case_config()
+    sheets = config['sheets']
+    xls = pd.ExcelFile(excel_path)
+
+    def parse(role, **kwargs):
+        name = find_sheet(xls.sheet_names, sheets[role])
+        if name is None:
+            raise ValueError(f"{excel_path}: no '{sheets[role]}' sheet, found {xls.sheet_names}")
+        return xls.parse(name, **kwargs)
+
+    department_split = None
+    if find_sheet(xls.sheet_names, sheets['department_split']):
+        department_split = with_header_row(parse('department_split', header=None), 'splittable')
+
+    min_split = None
+    if find_sheet(xls.sheet_names, sheets['min_split']):
+        min_split = with_header_row(parse('min_split', header=None), 'min')
+
+    adjacency = None
+    adjacency_sheets = [n for n in xls.sheet_names if 'Adjacency' in n and 'Neighborhood' not in n]
+    if adjacency_sheets:
+        raw_adj = xls.parse(adjacency_sheets[0], header=1, index_col=0)
+        adjacency = raw_adj.apply(pd.to_numeric, errors='coerce')
+        adjacency.index = adjacency.index.astype(str).str.strip()
+        adjacency.columns = adjacency.columns.astype(str).str.strip()
+
+    decentral_add = None
+    if find_sheet(xls.sheet_names, sheets['logic']):
+        decentral_add = parse_decentral_logic(parse('logic', header=None))
+
+    return build_program(parse('floors'), parse('blocks'), department_split, adjacency,
+                         decentral_add, config, min_split)
@@ -0,0 +1,67 @@
+import pandas as pd
+
+from .rejections import reason_columns
+from .reports import PlanReports
+
+# ----------------------------------------
+# Plan -> the four output tables of the case scripts
+# ----------------------------------------
+
+DETAILED_COLUMNS = ['Block_ID', 'Floor', 'Department', 'Block_Name', 'Destination_Group',
+                    'SpaceMix', 'Assigned_Area_SQM', 'Max_Occupancy', 'Asset_Type']
+UNASSIGNED_COLUMNS = ['Block_ID', 'Department', 'Block_Name', 'Destination_Group', 'SpaceMix',
+                      'Area_SQM', 'Max_Occupancy', 'Asset_Type', 'Reasons', 'Nearest_Floor']
+
+
+def _block_row(blk):
+    return {
+        'Block_ID': blk.get('Block_ID', ''),
+        'Department': blk.get('Department_Sub_Department', ''),
+        'Block_Name': blk.get('Block_Name', ''),
+        'Destination_Group': blk.get('Destination_Group', ''),
+        'SpaceMix': blk.get('SpaceMix', ''),
+        'Max_Occupancy': blk.get('Max_Occupancy', 0),
+        'Asset_Type': blk.get('Asset_Type', ''),
+    }
+
+
+def build_reports(plan):
+    """detailed_df, unassigned_df and the lazy PlanReports of a finished plan."""
+    rows = [dict(_block_row(blk), Floor=fl, Assigned_Area_SQM=blk['Area_SQM'])
+            for fl, info in plan['assignments'].items() for blk in info['assigned_blocks']]
+    detailed_df = pd.DataFrame(rows, columns=DETAILED_COLUMNS)
+    unassigned_df = pd.DataFrame([dict(_block_row(blk), Area_SQM=blk['Area_SQM'], **reason_columns(plan, blk))
+                                  for blk in plan['unassigned']], columns=UNASSIGNED_COLUMNS)
+
+    program = plan['program']
+    floor_input = program['floors'][['Name', 'Usable_Area', 'Max_Capacity']].rename(columns={
+        'Name': 'Floor', 'Usable_Area': 'Input_Usable_Area', 'Max_Capacity': 'Input_Max_Capacity'})
+    blocks = program['blocks']
+    reports = PlanReports(detailed_df, plan['floors'], floor_input,
+                          blocks[blocks['Typical_Destination'] == 'Typical'])
+    return detailed_df, unassigned_df, reports
+
+
+def build_outputs(plan):
+    """Returns detailed_df, floor_summary_df, space_mix_df, unassigned_df for a finished plan."""
+    detailed_df, unassigned_df, reports = build_reports(plan)
+    return detailed_df, reports.floor_summary, reports.space_mix, unassigned_df
+
+
+def make_typical_summary(detailed_df, typical_blocks):
+    """Block type x floor counts of typical blocks, with totals and assignment ratio."""
+    if detailed_df.empty:
+        return pd.DataFrame()
+    floors = sorted(detailed_df['Floor'].unique())
+    return PlanReports(detailed_df, floors, typical_blocks=typical_blocks).typical_summary
+
+
+def write_plan(path, detailed, floor_summary, space_mix, unassigned, typical_summary=None):
+    """One plan as an Excel workbook with the sheet names the case scripts use."""
+    with pd.ExcelWriter(path) as writer:
+        detailed.to_excel(writer, sheet_name='Detailed', index=False)
+        floor_summary.to_excel(writer, sheet_name='Floor_Summary', index=False)
+        space_mix.to_excel(writer, sheet_name='SpaceMix_By_Units', index=False)
+        unassigned.to_excel(writer, sheet_name='Unassigned', index=False)
+        if typical_summary is not None and not typical_summary.empty:
+            typical_summary.to_excel(writer, sheet_name='Typical_Summary')
@@ -0,0 +1,175 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cases import MODES, PRIORITY_CATEGORIES
+from .engine import stack
+from .floors import floor_spread
+from .plan import SPACE_MIX_CATEGORIES, destination_floor_count
+
+# ----------------------------------------
+# Pareto exploration of stacking strategies
+# ----------------------------------------
+#
+# Instead of the 12 fixed mode x priority category plans, explore() samples
+# strategy parameters (mode, full category order, the mode's De-Centralized
+# Logic 'Add', seed), stacks each sample, and scores the plan on four
+# objectives, all minimised:
+#
+#   Unassigned_Area      area of the blocks left unassigned
+#   Adjacency_Penalty    minus the adjacency weights of department pairs that
+#                        share a floor (a -1 forbid adds 1)
+#   SpaceMix_Deviation   mean over floors of the L1 distance between the
+#                        floor's space-mix unit shares and the building's
+#   Destination_Spread   floors between the lowest and highest floor of each
+#                        destination group, summed over groups
+#
+# Only non-dominated samples are kept; explore() returns them as one table.
+
+OBJECTIVES = ['Unassigned_Area', 'Adjacency_Penalty', 'SpaceMix_Deviation', 'Destination_Spread']
+
+ADD_SECTIONS = {'semi': 'Semi Centralized', 'decentralized': 'DeCentralised'}
+
+
+def adjacency_penalty(plan):
+    program = plan['program']
+    adjacency = program['adjacency']
+    if adjacency.empty:
+        return 0.0
+    weights = adjacency.fillna(0)
+    score = 0.0
+    for fl, info in plan['assignments'].items():
+        depts = [d for d in info['assigned_departments'] if d in weights.index]
+        for i, a in enumerate(depts):
+            for b in depts[i + 1:]:
+                if b in weights.columns:
+                    score += weights.at[a, b]
+    return -float(score)
+
+
+def space_mix_deviation(plan):
+    counts = np.array([[sum(1 for blk in info['assigned_blocks'] if blk['SpaceMix'] == cat)
+                        for cat in SPACE_MIX_CATEGORIES]
+                       for info in plan['assignments'].values()], dtype=float)
+    per_floor = counts.sum(axis=1)
+    used = per_floor > 0
+    if not used.any():
+        return 0.0
+    overall = counts.sum(axis=0) / counts.sum()
+    shares = counts[used] / per_floor[used, None]
+    return float(np.abs(shares - overall).sum(axis=1).mean())
+
+
+def destination_spread(plan):
+    dest_values = plan['config']['destination_values']
+    group_floors = {}
+    for fl, info in plan['assignments'].items():
+        for blk in info['assigned_blocks']:
+            if blk['Typical_Destination'] in dest_values and blk.get('Asset_Type') != 'Immovable Asset':
+                group_floors.setdefault(blk['Destination_Group'], set()).add(fl)
+    index = plan['program']['floor_index']
+    return sum(floor_spread(index, floors) for floors in group_floors.values())
+
+
+def plan_objectives(plan):
+    """The four OBJECTIVES of a finished plan."""
+    return {
+        'Unassigned_Area': float(sum(blk['Area_SQM'] for blk in plan['unassigned'])),
+        'Adjacency_Penalty': adjacency_penalty(plan),
+        'SpaceMix_Deviation': round(space_mix_deviation(plan), 4),
+        'Destination_Spread': destination_spread(plan),
+    }
+
+
+def dominates(a, b):
+    """True if objective vector a is no worse than b everywhere and better somewhere."""
+    return all(x <= y for x, y in zip(a, b)) and any(x < y for x, y in zip(a, b))
+
+
+def add_to_front(front, row):
+    """Adds row to the non-dominated archive front (a list of rows) unless it is dominated."""
+    point = [row[k] for k in OBJECTIVES]
+    for other in front:
+        other_point = [other[k] for k in OBJECTIVES]
+        if dominates(other_point, point) or other_point == point:
+            return False
+    front[:] = [other for other in front if not dominates(point, [other[k] for k in OBJECTIVES])]
+    front.append(row)
+    return True
+
+
+def sample_strategies(program, samples, modes=None, categories=None, max_add=None, seed=None):
+    """
+    samples distinct parameter sets {'Mode', 'Category_Order', 'Add', 'Seed'}.
+    'Add' is drawn from 0..max_add (default: the floors above the base
+    destination floors) for semi and decentralized plans and is None otherwise.
+    """
+    rng = random.Random(seed)
+    modes = modes or MODES
+    categories = list(categories or PRIORITY_CATEGORIES)
+    if max_add is None:
+        max_add = max(len(program['floors']) - program['config']['base_destination_floors'], 0)
+    seen, params = set(), []
+    for _ in range(samples * 10):
+        if len(params) >= samples:
+            break
+        mode = rng.choice(modes)
+        order = tuple(rng.sample(categories, len(categories)))
+        add = rng.randint(0, max_add) if mode in ADD_SECTIONS else None
+        key = (mode, order, add)
+        if key in seen:
+            continue
+        seen.add(key)
+        params.append({'Mode': mode, 'Category_Order': order, 'Add': add, 'Seed': rng.randrange(2 ** 31)})
+    return params
+
+
+_worker_program = None
+
+
+def _init_worker(program):
+    global _worker_program
+    _worker_program = program
+
+
+def evaluate(program, params):
+    """Stacks one parameter set and returns it with its objectives and destination floor count."""
+    mode = params['Mode']
+    if params['Add'] is not None:
+        add = dict(program['decentral_add'], **{ADD_SECTIONS[mode]: params['Add']})
+        program = dict(program, decentral_add=add)
+    plan = stack(program, mode, list(params['Category_Order']), params['Seed'])
+    return dict(params, Destination_Floors=destination_floor_count(program, mode), **plan_objectives(plan))
+
+
+def _evaluate_in_worker(params):
+    return evaluate(_worker_program, params)
+
+
+def explore(program, samples=100, modes=None, categories=None, max_add=None, seed=None, workers=None):
+    """
+    Samples `samples` strategies (see sample_strategies), stacks them on
+    `workers` processes (1 runs them here) and returns the Pareto front as a
+    DataFrame: Mode, Category_Order, Add, Seed, Destination_Floors and the
+    OBJECTIVES, sorted by unassigned area.
+    """
+    params = sample_strategies(program, samples, modes, categories, max_add, seed)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(params) or 1))
+    front = []
+    if workers == 1:
+        for p in params:
+            add_to_front(front, evaluate(program, p))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(program,)) as pool:
+            for row in pool.map(_evaluate_in_worker, params, chunksize=max(1, len(params) // (4 * workers))):
+                add_to_front(front, row)
+
+    table = pd.DataFrame(front, columns=['Mode', 'Category_Order', 'Add', 'Seed', 'Destination_Floors']
+                         + OBJECTIVES)
+    table['Category_Order'] = table['Category_Order'].map(' > '.join)
+    table['Add'] = table['Add'].astype('Int64')
+    return table.sort_values(OBJECTIVES).reset_index(drop=True)
@@ -0,0 +1,361 @@
+import math
+import re
+
+from .block_types import block_types, fit_count, water_fill
+from .department_split import min_share, waterfall_split
+from .floors import distance_to, floor_spread, match_level
+from .group_split import split_group
+from .plan import (SPACE_MIX_CATEGORIES, allowed, can_place, feasibility_mask, floors_around, floors_by_space,
+                   floors_for, fits, free_share, place, place_many, unknown_destination)
+from .rejections import SPLIT_RULE, reject
+
+# ----------------------------------------
+# Pluggable placement phases
+# ----------------------------------------
+#
+# A phase is a function phase(plan) that places blocks on plan['assignments']
+# through plan.place() (place_many() for a batch of one block type) and
+# hands what it cannot place to rejections.reject(), which records the checks
+# that failed and appends the blocks to plan['unassigned'].  Typical-block
+# phases take their blocks from plan['pending_typical'] and leave the rest
+# there for the next phase.
+# Blocks an early phase places ahead of their kind (the 'physical' phase)
+# are recorded in plan['preplaced'] and skipped by the later ones.
+# A case lists the phases it runs by name (config['phases']); new strategies
+# are added with @register_phase('name').
+
+PHASES = {}
+
+FILL_ROUNDS = 4
+
+
+def register_phase(name):
+    def register(func):
+        PHASES[name] = func
+        return func
+    return register
+
+
+@register_phase('immovable')
+def place_immovable(plan):
+    """Immovable blocks go on the floor named in their Level column (floors.match_level)."""
+    blocks = plan['program']['blocks']
+    registry = plan['program']['floor_registry']
+    for blk in blocks[blocks['Asset_Type'] == 'Immovable Asset'].to_dict('records'):
+        fl = match_level(registry, blk.get('Level', ''))
+        if fl and fits(plan, fl, blk['Area_SQM'], blk['Max_Occupancy']):
+            place(plan, fl, blk)
+        else:
+            reject(plan, [blk])
+
+
+def floor_positions(plan):
+    """{'lowest': [floor], 'mid': [floors], 'highest': [floor]} by level number (New_AR get_floor_levels)."""
+    levels = plan['program']['floor_registry']['levels']
+    ordered = sorted(plan['floors'], key=lambda fl: (levels.get(fl) is None, levels.get(fl) or 0))
+    return {'lowest': ordered[:1], 'mid': ordered[1:-1], 'highest': ordered[-1:]}
+
+
+@register_phase('physical')
+def place_physical(plan):
+    """
+    New_AR Phase 0: movable blocks whose Block_Name matches a pattern of
+    config['physical_constraints'] go first on the first floor of the
+    constraint's positions they fit; the others are left to the later phases.
+    """
+    rules = [(re.compile(pattern, re.IGNORECASE), kinds)
+             for pattern, kinds in plan['config']['physical_constraints']]
+    if not rules:
+        return
+    positions = floor_positions(plan)
+    blocks = plan['program']['blocks']
+    movable = blocks[(blocks['Asset_Type'] != 'Immovable Asset') & ~unknown_destination(blocks, plan['config'])]
+    for blk in movable.to_dict('records'):
+        kinds = next((kinds for pattern, kinds in rules if pattern.search(str(blk['Block_Name']))), None)
+        if kinds is None:
+            continue
+        fl = next((f for kind in kinds for f in positions[kind] if can_place(plan, blk, f)), None)
+        if fl is not None:
+            place(plan, fl, blk)
+            plan['preplaced'].add(blk['Block_Index'])
+    plan['pending_typical'] = [blk for blk in plan['pending_typical']
+                               if blk['Block_Index'] not in plan['preplaced']]
+
+
+def destination_groups(plan):
+    """{Destination_Group: [blocks]} of the movable destination blocks no earlier phase placed."""
+    blocks = plan['program']['blocks']
+    dest = blocks[(blocks['Asset_Type'] != 'Immovable Asset') &
+                  blocks['Typical_Destination'].isin(plan['config']['destination_values']) &
+                  ~blocks['Block_Index'].isin(plan['preplaced'])]
+    groups = {}
+    for blk in dest.to_dict('records'):
+        groups.setdefault(blk['Destination_Group'], []).append(blk)
+    return groups
+
+
+@register_phase('destination')
+def place_destination_groups(plan):
+    """
+    Whole groups first on the mode's destination floors, then on any floor.
+    A group that fits nowhere whole is split over the fewest (preferably
+    consecutive) floors by split_group(); only if that fails too are its
+    blocks placed one by one, largest first, on the floors with most space left.
+    """
+    groups = destination_groups(plan)
+    names = list(groups)
+    if plan['config']['shuffle_groups']:
+        plan['rng'].shuffle(names)
+    floors = plan['floors']
+    for grp in names:
+        blocks = groups[grp]
+        area = sum(b['Area_SQM'] for b in blocks)
+        cap = sum(b['Max_Occupancy'] for b in blocks)
+        target = next((fl for fl in floors[:plan['max_dest_floors']] + floors[plan['max_dest_floors']:]
+                       if fits(plan, fl, area, cap) and all(_allowed_whole(plan, b, fl) for b in blocks)),
+                      None)
+        if target is not None:
+            for blk in blocks:
+                place(plan, target, blk)
+            continue
+        floor_space = []
+        for fl in floors:
+            info = plan['assignments'][fl]
+            if all(_allowed_whole(plan, b, fl) for b in blocks):
+                floor_space.append((fl, max(info['remaining_area'], 0), max(info['remaining_capacity'], 0)))
+            else:
+                floor_space.append((fl, 0, 0))
+        split = split_group(blocks, floor_space, plan['max_dest_floors'])
+        if split is not None:
+            for fl, piece in split:
+                for blk in piece:
+                    place(plan, fl, blk)
+            continue
+        for blk in sorted(blocks, key=lambda b: b['Area_SQM'], reverse=True):
+            fl = next((f for f in floors_for(plan, blk) if can_place(plan, blk, f)), None)
+            if fl is None:
+                reject(plan, [blk])
+            else:
+                place(plan, fl, blk)
+
+
+def _allowed_whole(plan, blk, fl):
+    """can_place() without the space check, for blocks placed as one group."""
+    return can_place(plan, dict(blk, Area_SQM=0, Max_Occupancy=0), fl)
+
+
+@register_phase('department_split')
+def place_department_splits(plan):
+    """
+    Typical blocks of departments with a Splittable rule (anything but -1)
+    are placed per department with waterfall_split(); the others stay pending.
+    Each department is split twice, over the roomiest floors first and
+    outwards from the floor it is already on (or the freest floor); the split
+    with fewer pieces is kept, or on a tie the one with less vertical spread.
+    """
+    program = plan['program']
+    splittable = program['dept_splittable']
+    groups, rest = {}, []
+    for blk in plan['pending_typical']:
+        dept = blk['Department_Sub_Department']
+        if splittable.get(dept, -1) == -1:
+            rest.append(blk)
+        else:
+            groups.setdefault(dept, []).append(blk)
+    plan['pending_typical'] = rest
+
+    for dept, blocks in groups.items():
+        keep_together = splittable.get(dept) == 1
+        candidates = [fl for fl, ok in zip(plan['floors'], feasibility_mask(plan, [dept])[0]) if ok]
+        split = None
+        if candidates:
+            anchor = floors_for(plan, blocks[0], candidates)[0]
+            for order in (floors_by_space(plan, candidates), floors_around(plan, anchor, candidates)):
+                floor_space = [
+                    (fl, plan['assignments'][fl]['remaining_area'], plan['assignments'][fl]['remaining_capacity'])
+                    for fl in order
+                ]
+                option = waterfall_split(blocks, floor_space, min_share(program['dept_min_pct'], dept),
+                                         keep_together)
+                if option is not None and \
+                        (split is None or _split_cost(plan, option) < _split_cost(plan, split)):
+                    split = option
+        if split is None:
+            # floors that pass every per-block check failed the department's split rule
+            reject(plan, blocks, plan['floors'], SPLIT_RULE)
+            continue
+        for fl, piece in split:
+            for blk in piece:
+                place(plan, fl, blk)
+
+
+def _split_cost(plan, split):
+    return len(split), floor_spread(plan['program']['floor_index'], [fl for fl, _ in split])
+
+
+def category_order(priority_category):
+    """
+    Space-mix categories in placement order: priority_category first (or a
+    list of categories first, in that order), then the others.
+    """
+    first = [priority_category] if isinstance(priority_category, str) else list(priority_category)
+    first = [c for c in dict.fromkeys(first) if c in SPACE_MIX_CATEGORIES]
+    return first + [c for c in SPACE_MIX_CATEGORIES if c not in first]
+
+
+def floor_targets(count, avail, floors):
+    """Splits count blocks over floors in proportion to avail, largest remainder rounding."""
+    total_avail = sum(avail.values())
+    raw = {fl: (avail[fl] / total_avail if total_avail > 0 else 1 / len(floors)) * count for fl in floors}
+    targ = {fl: int(round(raw[fl])) for fl in floors}
+    diff = count - sum(targ.values())
+    if diff:
+        frac = {fl: raw[fl] - math.floor(raw[fl]) for fl in floors}
+        if diff > 0:
+            for fl in sorted(floors, key=lambda x: frac[x], reverse=True)[:diff]:
+                targ[fl] += 1
+        else:
+            for fl in sorted(floors, key=lambda x: frac[x])[:-diff]:
+                targ[fl] -= 1
+    return targ
+
+
+@register_phase('typical_by_category')
+def place_typical_by_category(plan):
+    """
+    New_AR Phase 2: categories in priority order; every Block_Name is spread
+    over the floors in proportion to their remaining area.  Each floor's
+    share is placed per block type in bulk.  Keep-together departments are
+    placed whole on one floor (place_together).
+    """
+    floors = plan['floors']
+    by_category = {cat: {} for cat in category_order(plan['priority_category'])}
+    rest = []
+    for blk in plan['pending_typical']:
+        cat = str(blk['SpaceMix']).strip()
+        if cat in by_category:
+            by_category[cat].setdefault(blk['Block_Name'], []).append(blk)
+        else:
+            rest.append(blk)
+    plan['pending_typical'] = rest
+
+    splittable = plan['program']['dept_splittable']
+    pending = {}  # keep-together department -> [area, capacity] of its typical blocks still to place
+    for names in by_category.values():
+        for blks in names.values():
+            for blk in blks:
+                if splittable.get(blk['Department_Sub_Department'], -1) == 1:
+                    totals = pending.setdefault(blk['Department_Sub_Department'], [0.0, 0.0])
+                    totals[0] += blk['Area_SQM']
+                    totals[1] += blk['Max_Occupancy']
+
+    for cat, names in by_category.items():
+        avail = {fl: plan['assignments'][fl]['remaining_area'] for fl in floors}
+        if sum(avail.values()) <= 0:
+            for blks in names.values():
+                reject(plan, blks)
+            continue
+        for blks in names.values():
+            together = [b for b in blks if b['Department_Sub_Department'] in pending]
+            if together:
+                place_together(plan, together, pending)
+                blks = [b for b in blks if b['Department_Sub_Department'] not in pending]
+            targ = floor_targets(len(blks), avail, floors)
+            if len(block_types(blks)) > 1:
+                # which types a floor's share holds is drawn at random; identical blocks need no shuffle
+                plan['rng'].shuffle(blks)
+            idx = 0
+            for fl in floors:
+                share = blks[idx:idx + max(targ[fl], 0)]
+                idx += len(share)
+                for template, instances in block_types(share):
+                    n = 0
+                    if allowed(plan, template, fl):
+                        n = min(len(instances), fit_count(plan['assignments'][fl], template['Area_SQM'],
+                                                          template['Max_Occupancy']))
+                    place_many(plan, fl, template, instances[:n])
+                    reject(plan, instances[n:], [fl])
+            reject(plan, blks[idx:])
+
+
+def place_together(plan, blks, pending):
+    """
+    Blocks of keep-together departments (Splittable == 1) are not spread over
+    the floors: each block type goes to the floor its department is on or,
+    for a department not placed yet, the first floor floors_for() ranks that
+    holds all of its typical blocks still pending.
+    """
+    for template, instances in block_types(blks):
+        dept = template['Department_Sub_Department']
+        options = [fl for fl in floors_for(plan, template) if allowed(plan, template, fl)]
+        n, tried = 0, None
+        if options:
+            area, capacity = pending[dept]
+            fl = next((f for f in options if fits(plan, f, area, capacity)), options[0])
+            n = min(len(instances), fit_count(plan['assignments'][fl], template['Area_SQM'],
+                                              template['Max_Occupancy']))
+            place_many(plan, fl, template, instances[:n])
+            tried = [fl]
+        reject(plan, instances[n:], tried)
+        pending[dept][0] -= template['Area_SQM'] * len(instances)
+        pending[dept][1] -= template['Max_Occupancy'] * len(instances)
+
+
+def fill_type(plan, template, instances):
+    """
+    Places instances of template's block type as placing them one at a time
+    on the floor floors_for() ranks first would, in one water_fill() step; the
+    distances are measured from the department's floors (or the floor its
+    first block would take) when the type starts.  Returns the blocks left over.
+    """
+    weight = plan['config']['space_weight']
+    area, capacity = template['Area_SQM'], template['Max_Occupancy']
+    dept = template.get('Department_Sub_Department', '')
+    options = [(fl, fit_count(plan['assignments'][fl], area, capacity))
+               for fl in floors_for(plan, template) if allowed(plan, template, fl)]
+    options = [(fl, limit) for fl, limit in options if limit > 0]
+    if not options:
+        return instances
+    if plan['program']['dept_splittable'].get(dept, -1) == 1 and not plan['dept_floors'].get(dept):
+        options = options[:1]  # keep-together: the first block's floor takes them all
+    anchor = plan['dept_floors'].get(dept) or [options[0][0]]
+    alloc = water_fill(len(instances), [
+        (fl, distance_to(plan, anchor, fl) - weight * free_share(plan, fl),
+         weight * area / (plan['floor_area'][fl] or 1), limit)
+        for fl, limit in options])
+    idx = 0
+    for fl, n in alloc.items():
+        place_many(plan, fl, template, instances[idx:idx + n])
+        idx += n
+    return instances[idx:]
+
+
+@register_phase('typical_fill')
+def place_typical_fill(plan):
+    """
+    DR.py Phase 4.3: every typical block on the floor floors_for() ranks
+    first.  The block types take turns, FILL_ROUNDS shares of each type,
+    so no type uses up the floors before the others get a share.
+    """
+    types = block_types(plan['pending_typical'])
+    for r in range(FILL_ROUNDS):
+        for template, instances in types:
+            share = -(-len(instances) // FILL_ROUNDS)
+            reject(plan, fill_type(plan, template, instances[r * share:(r + 1) * share]))
+    plan['pending_typical'] = []
+
+
+@register_phase('retry_unassigned')
+def retry_unassigned(plan):
+    """
+    AAR1 Phase 3: one more pass over the unassigned blocks, immovable ones
+    and those of an unknown Typical_Destination excepted.  Blocks the pass
+    cannot place either are recorded again against the floors as they are now.
+    """
+    known = set(plan['config']['destination_values']) | {'Typical'}
+    retry, plan['unassigned'] = plan['unassigned'], []
+    for template, instances in block_types(retry):
+        if template.get('Asset_Type') == 'Immovable Asset' or template.get('Typical_Destination') not in known:
+            plan['unassigned'].extend(instances)
+        else:
+            reject(plan, fill_type(plan, template, instances))
@@ -0,0 +1,238 @@
+import random
+
+import numpy as np
+
+from .floors import dept_distance
+from .rejections import new_log, reject
+
+# ----------------------------------------
+# Plan state shared by all phases
+# ----------------------------------------
+#
+# A plan is a dict.  plan['assignments'] has the per-floor entries the case
+# scripts built in initialize_floor_assignments(); the department indexes
+# (dept_floors, floor_dept_bits) are kept in step with them by place(), so
+# every phase gets O(1) adjacency and keep-together checks, and
+# feasibility_mask() makes them for whole departments against all floors at
+# once.  plan['rejections'] records why the blocks left unassigned could not
+# be placed (rejections.py).
+
+SPACE_MIX_CATEGORIES = ['ME', 'WE', 'US', 'Support', 'Speciality']
+
+
+def initialize_floor_assignments(floor_df):
+    """Per-floor remaining area/capacity, assigned blocks and departments, area per category."""
+    assignments = {}
+    for _, row in floor_df.iterrows():
+        assignments[row['Name']] = {
+            'remaining_area': row['Usable_Area'],
+            'remaining_capacity': row['Max_Capacity'],
+            'assigned_blocks': [],
+            'assigned_departments': set(),
+            'DeptArea': {},
+            **{cat + '_area': 0.0 for cat in SPACE_MIX_CATEGORIES},
+        }
+    return assignments
+
+
+def destination_floor_count(program, mode):
+    """Floors reserved for destination blocks in a mode."""
+    base = program['config']['base_destination_floors']
+    if mode == 'semi':
+        return base + program['decentral_add']['Semi Centralized']
+    if mode == 'decentralized':
+        return base + program['decentral_add']['DeCentralised']
+    return base
+
+
+def unknown_destination(blocks, config):
+    """Mask of the movable blocks whose Typical_Destination is neither 'Typical' nor a destination value."""
+    return (blocks['Asset_Type'] != 'Immovable Asset') & \
+        ~blocks['Typical_Destination'].isin(list(config['destination_values']) + ['Typical'])
+
+
+def new_plan(program, mode='centralized', priority_category='ME', seed=None):
+    """
+    Empty plan for one mode / priority category; typical blocks start out
+    pending and blocks of an unknown Typical_Destination start out unassigned.
+    """
+    floors = list(program['floors']['Name'])
+    blocks = program['blocks']
+    movable = blocks[blocks['Asset_Type'] != 'Immovable Asset']
+    unknown = blocks[unknown_destination(blocks, program['config'])]
+    plan = {
+        'program': program,
+        'config': program['config'],
+        'mode': mode,
+        'priority_category': priority_category,
+        'rng': random.Random(seed),
+        'floors': floors,
+        'max_dest_floors': min(destination_floor_count(program, mode), len(floors)),
+        'assignments': initialize_floor_assignments(program['floors']),
+        'floor_area': dict(zip(floors, program['floors']['Usable_Area'])),
+        'unassigned': [],
+        'pending_typical': movable[movable['Typical_Destination'] == 'Typical'].to_dict('records'),
+        'preplaced': set(),
+        'dept_floors': {},
+        'floor_dept_bits': {},
+        'rejections': new_log(len(blocks)),
+    }
+    reject(plan, unknown.to_dict('records'))
+    return plan
+
+
+def primary_category(blk):
+    """Space-mix category a block's area is booked under."""
+    mix = str(blk.get('SpaceMix', '')).strip()
+    if mix in SPACE_MIX_CATEGORIES:
+        return mix
+    for cat in ['ME', 'WE', 'US']:
+        if cat in mix:
+            return cat
+    return 'Support'
+
+
+def fits(plan, fl, area, capacity):
+    info = plan['assignments'][fl]
+    return info['remaining_area'] >= area and info['remaining_capacity'] >= capacity
+
+
+def on_other_floor(plan, dept, fl):
+    """True if dept is already placed on a floor other than fl."""
+    on_floors = plan['dept_floors'].get(dept)
+    return bool(on_floors) and (len(on_floors) > 1 or fl not in on_floors)
+
+
+def allowed(plan, blk, fl):
+    """
+    Rule checks that do not depend on space: hard adjacency forbids, the
+    decentralized destination-floor lock and keep-together (Splittable == 1).
+    """
+    program = plan['program']
+    dept = blk.get('Department_Sub_Department', '')
+    if plan['config']['check_adjacency'] and \
+            program['forbidden_mask'].get(dept, 0) & plan['floor_dept_bits'].get(fl, 0):
+        return False
+    if plan['mode'] == 'decentralized' and \
+            blk.get('Typical_Destination') in plan['config']['destination_values'] and \
+            fl not in plan['floors'][:plan['max_dest_floors']]:
+        return False
+    if program['dept_splittable'].get(dept, -1) == 1 and on_other_floor(plan, dept, fl):
+        return False
+    return True
+
+
+def feasibility_mask(plan, depts, floor_list=None):
+    """
+    Department x floor boolean array, True where allowed() lets a block of
+    the department (rows in the order of depts) onto the floor: no hard
+    adjacency forbid against the departments already there and, for a
+    keep-together department, no floor other than its own.  The
+    decentralized destination-floor lock is not part of it.
+    """
+    program = plan['program']
+    floor_list = plan['floors'] if floor_list is None else floor_list
+    mask = np.ones((len(depts), len(floor_list)), dtype=bool)
+    if not len(depts) or not len(floor_list):
+        return mask
+    if plan['config']['check_adjacency']:
+        # object arrays: the department bitsets are Python ints of any width
+        forbid = np.array([program['forbidden_mask'].get(dept, 0) for dept in depts], dtype=object)
+        bits = np.array([plan['floor_dept_bits'].get(fl, 0) for fl in floor_list], dtype=object)
+        mask &= np.bitwise_and.outer(forbid, bits) == 0
+    for i, dept in enumerate(depts):
+        on_floors = plan['dept_floors'].get(dept)
+        if on_floors and program['dept_splittable'].get(dept, -1) == 1:
+            mask[i] &= [len(on_floors) == 1 and fl in on_floors for fl in floor_list]
+    return mask
+
+
+def can_place(plan, blk, fl):
+    return fits(plan, fl, blk['Area_SQM'], blk['Max_Occupancy']) and allowed(plan, blk, fl)
+
+
+def place(plan, fl, blk):
+    """Puts blk on floor fl and updates every running total and index."""
+    info = plan['assignments'][fl]
+    area = blk['Area_SQM']
+    dept = blk.get('Department_Sub_Department', '')
+    info['assigned_blocks'].append(blk)
+    info['remaining_area'] -= area
+    info['remaining_capacity'] -= blk['Max_Occupancy']
+    info[primary_category(blk) + '_area'] += area
+    info['DeptArea'][dept] = info['DeptArea'].get(dept, 0.0) + area
+    info['assigned_departments'].add(dept)
+    plan['dept_floors'].setdefault(dept, set()).add(fl)
+    plan['floor_dept_bits'][fl] = plan['floor_dept_bits'].get(fl, 0) | plan['program']['dept_bit'].get(dept, 0)
+
+
+def place_many(plan, fl, template, instances):
+    """place() for a batch of identical instances of template's block type, totals updated once."""
+    if not instances:
+        return
+    info = plan['assignments'][fl]
+    n = len(instances)
+    area = template['Area_SQM'] * n
+    dept = template.get('Department_Sub_Department', '')
+    info['assigned_blocks'].extend(instances)
+    info['remaining_area'] -= area
+    info['remaining_capacity'] -= template['Max_Occupancy'] * n
+    info[primary_category(template) + '_area'] += area
+    info['DeptArea'][dept] = info['DeptArea'].get(dept, 0.0) + area
+    info['assigned_departments'].add(dept)
+    plan['dept_floors'].setdefault(dept, set()).add(fl)
+    plan['floor_dept_bits'][fl] = plan['floor_dept_bits'].get(fl, 0) | plan['program']['dept_bit'].get(dept, 0)
+
+
+def floor_state_classes(plan, floor_list=None):
+    """
+    program['floor_classes'] split by the floors' current state (remaining
+    area and capacity, departments that count for adjacency, destination
+    floor or not): lists of floors that are interchangeable right now, in
+    floor order.
+    """
+    wanted = set(floor_list or plan['floors'])
+    dest = set(plan['floors'][:plan['max_dest_floors']])
+    classes = {}
+    for members in plan['program']['floor_classes']:
+        for fl in members:
+            if fl in wanted:
+                info = plan['assignments'][fl]
+                key = (members[0], info['remaining_area'], info['remaining_capacity'],
+                       plan['floor_dept_bits'].get(fl, 0), fl in dest)
+                classes.setdefault(key, []).append(fl)
+    index = plan['program']['floor_index']
+    return sorted(classes.values(), key=lambda members: index[members[0]])
+
+
+def floors_by_space(plan, floor_list=None):
+    """Floors with the most remaining area first."""
+    assignments = plan['assignments']
+    return sorted(floor_list or plan['floors'], key=lambda f: assignments[f]['remaining_area'], reverse=True)
+
+
+def free_share(plan, fl):
+    """Share of a floor's usable area still free."""
+    return plan['assignments'][fl]['remaining_area'] / (plan['floor_area'][fl] or 1)
+
+
+def floors_for(plan, blk, floor_list=None):
+    """
+    Floors for blk, best first.  A floor costs its distance in floors from the
+    nearest floor blk's department is already on, less config['space_weight']
+    times its free share, so departments stay on neighbouring levels without
+    packing the nearest floor full first.
+    """
+    weight = plan['config']['space_weight']
+    dept = blk.get('Department_Sub_Department', '')
+    return sorted(floor_list or plan['floors'],
+                  key=lambda f: dept_distance(plan, dept, f) - weight * free_share(plan, f))
+
+
+def floors_around(plan, anchor, floor_list=None):
+    """floors_for() with the distance measured from anchor."""
+    weight = plan['config']['space_weight']
+    index = plan['program']['floor_index']
+    row = plan['program']['floor_distance'][index[anchor]]
+    return sorted(floor_list or plan['floors'],
+                  key=lambda f: row[index[f]] - weight * free_share(plan, f))
@@ -0,0 +1,157 @@
+import json
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from .cache import program_fingerprint
+
+# ----------------------------------------
+# Binary plan files and plan diffs
+# ----------------------------------------
+#
+# save_plan() writes a finished plan as a folder of .npy arrays plus a JSON
+# header instead of an Excel workbook:
+#
+#   meta.json          format version, mode, priority category, floor and
+#                      department names, program fingerprint
+#   block_floor.npy    floor index of every block (by Block_Index), -1 if unassigned
+#   block_area.npy     area of every block
+#   block_dept.npy     department index of every block
+#   block_id.npy       Block_ID of every block
+#   floor_totals.npy   blocks, area and occupancy per floor
+#
+# load_plan() memory-maps the arrays, so opening a plan reads only the
+# header.  diff_plans() compares two plans of the same program with array
+# operations: blocks that moved, area per floor and department pairs that
+# started or stopped sharing a floor.
+
+FORMAT = 'stacking-plan'
+VERSION = 1
+
+ARRAYS = ['block_floor', 'block_area', 'block_dept', 'block_id', 'floor_totals']
+
+
+def save_plan(path, plan, seed=None):
+    """Writes a finished plan to the folder path (see the module comment)."""
+    program = plan['program']
+    blocks = program['blocks']
+    floors = plan['floors']
+    departments = sorted(blocks['Department_Sub_Department'].astype(str).unique())
+    dept_index = {d: i for i, d in enumerate(departments)}
+
+    block_floor = np.full(len(blocks), -1, dtype=np.int32)
+    floor_totals = np.zeros((len(floors), 3))
+    for f, fl in enumerate(floors):
+        assigned = plan['assignments'][fl]['assigned_blocks']
+        block_floor[[blk['Block_Index'] for blk in assigned]] = f
+        floor_totals[f] = [len(assigned), sum(blk['Area_SQM'] for blk in assigned),
+                           sum(blk['Max_Occupancy'] for blk in assigned)]
+
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        'block_floor': block_floor,
+        'block_area': blocks['Area_SQM'].to_numpy(dtype=float),
+        'block_dept': blocks['Department_Sub_Department'].astype(str).map(dept_index).to_numpy(dtype=np.int32),
+        'block_id': blocks['Block_ID'].astype(str).to_numpy(dtype=str),
+        'floor_totals': floor_totals,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + '.npy'), array)
+    meta = {
+        'format': FORMAT,
+        'version': VERSION,
+        'mode': plan['mode'],
+        'priority_category': plan['priority_category'],
+        'seed': seed,
+        'floors': floors,
+        'departments': departments,
+        'program': program_fingerprint(program),
+    }
+    with open(os.path.join(path, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=1)
+
+
+def load_plan(path, mmap=True):
+    """{'meta': header dict, <array name>: array} of a saved plan; arrays are memory-mapped."""
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format') != FORMAT or meta.get('version', 0) > VERSION:
+        raise ValueError(f"{path}: not a version {VERSION} {FORMAT} folder")
+    saved = {'meta': meta}
+    for name in ARRAYS:
+        saved[name] = np.load(os.path.join(path, name + '.npy'), mmap_mode='r' if mmap else None)
+    return saved
+
+
+def _as_saved(plan):
+    return load_plan(plan) if isinstance(plan, str) else plan
+
+
+def _colocated(saved, departments):
+    """Department x department matrix: True where both share some floor."""
+    index = np.array([departments.index(d) for d in saved['meta']['departments']])
+    placed = saved['block_floor'] >= 0
+    presence = np.zeros((len(departments), len(saved['meta']['floors'])), dtype=bool)
+    presence[index[saved['block_dept'][placed]], saved['block_floor'][placed]] = True
+    shared = presence.astype(np.int32) @ presence.T.astype(np.int32) > 0
+    np.fill_diagonal(shared, False)
+    return shared
+
+
+def diff_plans(a, b, adjacency=None):
+    """
+    Differences between two saved plans (folders or load_plan() dicts) of
+    the same program.  Returns a dict of DataFrames:
+
+      moved        Block_ID, From_Floor, To_Floor, Area_SQM of every block on
+                   another floor ('' for unassigned)
+      floors       Floor, Area_A, Area_B, Area_Delta, Blocks_Delta
+      adjacency    Department_A, Department_B, Change ('joined' / 'separated')
+                   and, if an adjacency matrix is given, its Weight
+    """
+    a, b = _as_saved(a), _as_saved(b)
+    if len(a['block_floor']) != len(b['block_floor']):
+        raise ValueError("diff_plans: the plans are of programs with different blocks")
+    if a['meta']['program'] != b['meta']['program']:
+        warnings.warn("diff_plans: the plans were made from different program versions")
+
+    floors_a = np.array(a['meta']['floors'] + [''], dtype=object)
+    floors_b = np.array(b['meta']['floors'] + [''], dtype=object)
+    names_a, names_b = floors_a[a['block_floor']], floors_b[b['block_floor']]
+    moved = np.nonzero(names_a != names_b)[0]
+    moved_df = pd.DataFrame({
+        'Block_ID': np.asarray(a['block_id'])[moved],
+        'From_Floor': names_a[moved],
+        'To_Floor': names_b[moved],
+        'Area_SQM': np.asarray(a['block_area'])[moved],
+    })
+
+    totals_a = pd.DataFrame(np.asarray(a['floor_totals']), index=a['meta']['floors'],
+                            columns=['Blocks', 'Area', 'Occupancy'])
+    totals_b = pd.DataFrame(np.asarray(b['floor_totals']), index=b['meta']['floors'],
+                            columns=['Blocks', 'Area', 'Occupancy'])
+    floor_names = list(dict.fromkeys(a['meta']['floors'] + b['meta']['floors']))
+    totals_a, totals_b = totals_a.reindex(floor_names, fill_value=0), totals_b.reindex(floor_names, fill_value=0)
+    floors_df = pd.DataFrame({
+        'Floor': floor_names,
+        'Area_A': totals_a['Area'].to_numpy(),
+        'Area_B': totals_b['Area'].to_numpy(),
+        'Area_Delta': (totals_b['Area'] - totals_a['Area']).to_numpy(),
+        'Blocks_Delta': (totals_b['Blocks'] - totals_a['Blocks']).astype(int).to_numpy(),
+    })
+
+    departments = sorted(set(a['meta']['departments']) | set(b['meta']['departments']))
+    shared_a, shared_b = _colocated(a, departments), _colocated(b, departments)
+    i, j = np.nonzero(np.triu(shared_a != shared_b))
+    adjacency_df = pd.DataFrame({
+        'Department_A': np.array(departments, dtype=object)[i],
+        'Department_B': np.array(departments, dtype=object)[j],
+        'Change': np.where(shared_b[i, j], 'joined', 'separated'),
+    })
+    if adjacency is not None and not adjacency.empty:
+        adjacency_df['Weight'] = [adjacency.at[x, y] if x in adjacency.index and y in adjacency.columns
+                                  else np.nan for x, y in zip(adjacency_df['Department_A'],
+                                                               adjacency_df['Department_B'])]
+    return {'moved': moved_df, 'floors': floors_df, 'adjacency': adjacency_df}
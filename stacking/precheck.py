@@ -0,0 +1,136 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from .cases import MODES
+from .floors import match_level
+from .plan import destination_floor_count
+
+# ----------------------------------------
+# LP-relaxation precheck
+# ----------------------------------------
+#
+# Before stacking, relax block -> floor assignment to a linear program:
+# every block may be split fractionally over the floors it is allowed on,
+# floors hold at most their usable area and capacity, immovable blocks only
+# go on the floor their Level names, and in decentralized mode destination
+# blocks only go on the mode's destination floors (base floors plus the
+# De-Centralized Logic 'Add').  Identical blocks share one variable per floor.
+# No real plan can leave less area unassigned than the relaxation's optimum,
+# so that optimum is a guaranteed lower bound; the floors whose area or
+# capacity limit has a shadow price and the departments left (partly)
+# unassigned show what binds.  A scenario whose bound is already too high
+# can be skipped without stacking it.
+
+
+def _block_groups(program, mode):
+    """{(dept, area, occupancy, allowed floors): count} of the program's blocks."""
+    blocks = program['blocks']
+    floors = list(program['floors']['Name'])
+    config = program['config']
+    dest_floors = tuple(floors[:min(destination_floor_count(program, mode), len(floors))])
+    groups = {}
+    for dept, area, occupancy, asset, kind, level in zip(
+            blocks['Department_Sub_Department'], blocks['Area_SQM'], blocks['Max_Occupancy'],
+            blocks['Asset_Type'], blocks['Typical_Destination'], blocks['Level']):
+        if asset == 'Immovable Asset':
+            fl = match_level(program['floor_registry'], level)
+            allowed = (fl,) if fl else ()
+        elif kind != 'Typical' and kind not in config['destination_values']:
+            allowed = ()  # unknown destination: never placed
+        elif mode == 'decentralized' and kind in config['destination_values']:
+            allowed = dest_floors
+        else:
+            allowed = None  # any floor
+        key = (dept, float(area), float(occupancy), allowed)
+        groups[key] = groups.get(key, 0) + 1
+    return groups
+
+
+def relaxation_bound(program, mode='centralized'):
+    """
+    Solves the LP relaxation for one mode.  Returns a dict with
+    'unassigned_area' (the lower bound), 'total_area', 'binding_floors'
+    (floor -> 'area' / 'capacity' / 'area+capacity'), 'binding_departments'
+    (department -> area left unassigned by the relaxation) and 'solve_ms'.
+    """
+    try:
+        from scipy.optimize import linprog
+        from scipy.sparse import coo_matrix
+    except ImportError:
+        raise ImportError("The LP precheck needs scipy (pip install scipy)")
+
+    start = time.perf_counter()
+    floors = list(program['floors']['Name'])
+    n_floors = len(floors)
+    index = {fl: i for i, fl in enumerate(floors)}
+    groups = list(_block_groups(program, mode).items())
+
+    # variables: one per (group, allowed floor), then one unassigned slack per group
+    arcs = []
+    for g, ((_, _, _, allowed), _) in enumerate(groups):
+        for fl in (floors if allowed is None else allowed):
+            arcs.append((g, index[fl]))
+    n_arcs, n_groups = len(arcs), len(groups)
+    areas = np.array([key[1] for key, _ in groups])
+    occupancy = np.array([key[2] for key, _ in groups])
+    counts = np.array([count for _, count in groups], dtype=float)
+
+    cost = np.concatenate([np.zeros(n_arcs), areas])
+    arc_group = np.array([g for g, _ in arcs], dtype=int)
+    arc_floor = np.array([f for _, f in arcs], dtype=int)
+    eq_rows = np.concatenate([arc_group, np.arange(n_groups)])
+    eq_cols = np.arange(n_arcs + n_groups)
+    a_eq = coo_matrix((np.ones(n_arcs + n_groups), (eq_rows, eq_cols)),
+                      shape=(n_groups, n_arcs + n_groups)).tocsr()
+    ub_rows = np.concatenate([arc_floor, n_floors + arc_floor])
+    ub_cols = np.concatenate([np.arange(n_arcs), np.arange(n_arcs)])
+    ub_vals = np.concatenate([areas[arc_group], occupancy[arc_group]])
+    a_ub = coo_matrix((ub_vals, (ub_rows, ub_cols)), shape=(2 * n_floors, n_arcs + n_groups)).tocsr()
+    b_ub = np.concatenate([np.maximum(program['floors']['Usable_Area'].to_numpy(dtype=float), 0),
+                           np.maximum(program['floors']['Max_Capacity'].to_numpy(dtype=float), 0)])
+    result = linprog(cost, A_ub=a_ub, b_ub=b_ub, A_eq=a_eq, b_eq=counts, bounds=(0, None), method='highs')
+    if result.status != 0:
+        raise ValueError(f"LP precheck failed for mode '{mode}': {result.message}")
+
+    marginals = result.ineqlin.marginals
+    binding_floors = {}
+    for i, fl in enumerate(floors):
+        limits = [name for name, m in (('area', marginals[i]), ('capacity', marginals[n_floors + i]))
+                  if m < -1e-9]
+        if limits:
+            binding_floors[fl] = '+'.join(limits)
+    binding_departments = {}
+    for g, ((dept, area, _, _), _) in enumerate(groups):
+        left = result.x[n_arcs + g] * area
+        if left > 1e-6:
+            binding_departments[dept] = binding_departments.get(dept, 0.0) + left
+    return {
+        'unassigned_area': float(result.fun),
+        'total_area': float((areas * counts).sum()),
+        'binding_floors': binding_floors,
+        'binding_departments': binding_departments,
+        'solve_ms': (time.perf_counter() - start) * 1000,
+    }
+
+
+def precheck(program, modes=None):
+    """
+    One row per mode: Mode, Total_Area, Unassigned_Area_LB (lower bound on
+    the area any plan leaves unassigned), Binding_Floors,
+    Binding_Departments (largest unassigned share first) and Solve_ms.
+    """
+    rows = []
+    for mode in modes or MODES:
+        bound = relaxation_bound(program, mode)
+        departments = sorted(bound['binding_departments'].items(), key=lambda d: d[1], reverse=True)
+        rows.append({
+            'Mode': mode,
+            'Total_Area': round(bound['total_area'], 2),
+            'Unassigned_Area_LB': round(bound['unassigned_area'], 2),
+            'Binding_Floors': ', '.join(f'{fl} ({limit})' for fl, limit in bound['binding_floors'].items()),
+            'Binding_Departments': ', '.join(f'{dept} ({area:.0f})' for dept, area in departments),
+            'Solve_ms': round(bound['solve_ms'], 1),
+        })
+    return pd.DataFrame(rows)
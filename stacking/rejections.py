@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+from .block_types import block_types
+from .floors import match_level
+
+# ----------------------------------------
+# Why blocks were left unassigned
+# ----------------------------------------
+#
+# Every plan carries plan['rejections'], arrays preallocated per block of the
+# program (indexed by Block_Index):
+#
+#   reasons          bitmask of what ruled floors out for the block (below),
+#                    over all the floors it was checked against
+#   nearest_floor    index of the floor closest to taking it, -1 if none
+#   nearest_reasons  what rules out that floor
+#   shortfall        area (m2) that floor is short of the block
+#
+# A phase that gives up on blocks hands them to reject(), which appends them
+# to plan['unassigned'] and records, per block type, the checks that fail on
+# the floors the phase tried, as those floors stand at that moment.  A floor
+# that passes every check gets the phase's own reason instead: ORDER by
+# default, SPLIT_RULE where a department's waterfall split found no division.
+# stack() records the blocks no phase got to.  The floor closest to taking a
+# block is the one breaking the fewest rules, then short of the least area,
+# then of the least capacity.
+
+AREA = 1
+CAPACITY = 2
+ADJACENCY = 4       # a forbidden department is on the floor
+SPLIT_RULE = 8      # keep-together department already on another floor
+DEST_LOCK = 16      # decentralized destination block off the destination floors
+LEVEL = 32          # immovable block whose Level names no floor
+ORDER = 64          # a floor could take it; the phase left it over (a share, quota or rounding)
+DESTINATION = 128   # movable block whose Typical_Destination is neither 'Typical' nor a destination value
+
+REASONS = [(AREA, 'area'), (CAPACITY, 'capacity'), (ADJACENCY, 'forbidden adjacency'),
+           (SPLIT_RULE, 'split rule'), (DEST_LOCK, 'destination lock'), (LEVEL, 'level'),
+           (ORDER, 'placement order'), (DESTINATION, 'unknown destination')]
+RULES = ADJACENCY | SPLIT_RULE | DEST_LOCK
+
+
+def new_log(n_blocks):
+    return {
+        'reasons': np.zeros(n_blocks, dtype=np.uint8),
+        'nearest_floor': np.full(n_blocks, -1, dtype=np.int32),
+        'nearest_reasons': np.zeros(n_blocks, dtype=np.uint8),
+        'shortfall': np.zeros(n_blocks),
+    }
+
+
+def reason_names(mask):
+    """'area, forbidden adjacency' style text of a reason bitmask."""
+    return ', '.join(name for bit, name in REASONS if int(mask) & bit)
+
+
+def candidate_floors(plan, blk):
+    """Floors a block is checked against: its Level's floor if immovable, else every floor."""
+    if blk.get('Asset_Type') == 'Immovable Asset':
+        fl = match_level(plan['program']['floor_registry'], blk.get('Level', ''))
+        return [fl] if fl else []
+    return plan['floors']
+
+
+def diagnose(plan, blk, floors=None, passed=ORDER):
+    """
+    (reasons, nearest floor or None, its reasons, its area shortfall) for one
+    block against floors (default: candidate_floors); passed is the reason of
+    a floor no check rules out.
+    """
+    if blk.get('Asset_Type') != 'Immovable Asset' and blk.get('Typical_Destination') != 'Typical' and \
+            blk.get('Typical_Destination') not in plan['config']['destination_values']:
+        return DESTINATION, None, DESTINATION, 0.0
+    if blk.get('Asset_Type') == 'Immovable Asset' or floors is None:
+        floors = candidate_floors(plan, blk)
+    if not floors:
+        return LEVEL, None, LEVEL, 0.0
+    program = plan['program']
+    assignments = plan['assignments']
+    dept = blk.get('Department_Sub_Department', '')
+    forbidden = program['forbidden_mask'].get(dept, 0) if plan['config']['check_adjacency'] else 0
+    keep_together = program['dept_splittable'].get(dept, -1) == 1
+    on_floors = plan['dept_floors'].get(dept)
+    dest_floors = set(plan['floors'][:plan['max_dest_floors']])
+    locked = plan['mode'] == 'decentralized' and \
+        blk.get('Typical_Destination') in plan['config']['destination_values']
+
+    short_area = np.array([blk['Area_SQM'] - assignments[fl]['remaining_area'] for fl in floors], dtype=float)
+    short_cap = np.array([blk['Max_Occupancy'] - assignments[fl]['remaining_capacity'] for fl in floors],
+                         dtype=float)
+    masks = np.where(short_area > 0, AREA, 0) | np.where(short_cap > 0, CAPACITY, 0)
+    for i, fl in enumerate(floors):
+        if forbidden & plan['floor_dept_bits'].get(fl, 0):
+            masks[i] |= ADJACENCY
+        if keep_together and on_floors and (len(on_floors) > 1 or fl not in on_floors):
+            masks[i] |= SPLIT_RULE
+        if locked and fl not in dest_floors:
+            masks[i] |= DEST_LOCK
+    rules = np.array([bin(int(m) & RULES).count('1') for m in masks])
+    best = np.lexsort((np.maximum(short_cap, 0), np.maximum(short_area, 0), rules))[0]
+    if masks[best] == 0:
+        masks[best] = passed
+    return (int(np.bitwise_or.reduce(masks)), floors[best], int(masks[best]),
+            float(max(short_area[best], 0)))
+
+
+def record(plan, blocks, floors=None, passed=ORDER):
+    """Diagnoses blocks (once per block type) and writes the results into plan['rejections']."""
+    log = plan['rejections']
+    index = plan['program']['floor_index']
+    movable = [blk for blk in blocks if blk.get('Asset_Type') != 'Immovable Asset']
+    immovable = [(blk, [blk]) for blk in blocks if blk.get('Asset_Type') == 'Immovable Asset']
+    for template, instances in block_types(movable) + immovable:
+        rows = [blk['Block_Index'] for blk in instances if blk.get('Block_Index') is not None]
+        if not rows:
+            continue
+        reasons, nearest, nearest_reasons, shortfall = diagnose(plan, template, floors, passed)
+        log['reasons'][rows] = reasons
+        log['nearest_floor'][rows] = index[nearest] if nearest is not None else -1
+        log['nearest_reasons'][rows] = nearest_reasons
+        log['shortfall'][rows] = shortfall
+
+
+def reject(plan, blocks, floors=None, passed=ORDER):
+    """
+    Leaves blocks unassigned: records why they fail on floors (default: every
+    floor they could go to) right now and appends them to plan['unassigned'].
+    """
+    blocks = list(blocks)
+    if blocks:
+        record(plan, blocks, floors, passed)
+        plan['unassigned'].extend(blocks)
+
+
+def reason_columns(plan, blk):
+    """Reasons and Nearest_Floor columns of an unassigned block in the unassigned table."""
+    log = plan['rejections']
+    row = blk.get('Block_Index')
+    if row is None or row >= len(log['reasons']):
+        return {'Reasons': '', 'Nearest_Floor': ''}
+    nearest = log['nearest_floor'][row]
+    return {'Reasons': reason_names(log['reasons'][row]),
+            'Nearest_Floor': plan['floors'][nearest] if nearest >= 0 else ''}
+
+
+def rejection_summary(plan):
+    """Blocks and area left unassigned per reason; a block counts under each of its reasons."""
+    log = plan['rejections']
+    blocks = plan['program']['blocks']
+    rows = np.array([blk['Block_Index'] for blk in plan['unassigned'] if blk.get('Block_Index') is not None],
+                    dtype=int)
+    reasons = log['reasons'][rows]
+    nearest = log['nearest_reasons'][rows]
+    areas = blocks['Area_SQM'].to_numpy(dtype=float)[rows]
+    return pd.DataFrame([{
+        'Reason': name,
+        'Blocks': int(np.count_nonzero(reasons & bit)),
+        'Area_SQM': float(areas[(reasons & bit) > 0].sum()),
+        'Blocks_Nearest_Floor': int(np.count_nonzero(nearest & bit)),
+    } for bit, name in REASONS])
@@ -0,0 +1,111 @@
+from functools import cached_property
+
+import pandas as pd
+
+from .plan import SPACE_MIX_CATEGORIES
+
+# ----------------------------------------
+# Lazy report tables of one plan
+# ----------------------------------------
+#
+# The case scripts build the SpaceMix table with one boolean filter of the
+# detailed table per floor and category, and the typical summary with one
+# filter of typical_blocks per block type.  PlanReports computes the shared
+# groupby/crosstab tables once, on first use, and derives floor_summary,
+# space_mix and typical_summary from them; a table nobody asks for is never built.
+# The intermediates can also be handed in ready-made (from_aggregates), which
+# is how streaming runs report without ever holding a detailed table.
+
+
+class PlanReports:
+    """Report tables of a detailed_df, each computed on first access and cached."""
+
+    def __init__(self, detailed_df, floors, floor_input=None, typical_blocks=None,
+                 categories=SPACE_MIX_CATEGORIES):
+        self.detailed = detailed_df
+        self.floors = list(floors)
+        self.floor_input = floor_input
+        self.typical_blocks = typical_blocks
+        self.categories = list(categories)
+
+    @classmethod
+    def from_aggregates(cls, floors, floor_input=None, **tables):
+        """
+        Reports from precomputed intermediates (floor_totals, floor_units,
+        category_counts, type_counts, typical_names) instead of a detailed table.
+        """
+        reports = cls(None, floors, floor_input)
+        reports.__dict__.update(tables)
+        return reports
+
+    # -- shared intermediate tables --------------------------------------------
+
+    @cached_property
+    def floor_totals(self):
+        """Blocks, area and occupancy per floor, in floor order."""
+        totals = (self.detailed.groupby('Floor', sort=False)
+                  .agg(Assgn_Blocks=('Block_Name', 'count'),
+                       Assgn_Area_SQM=('Assigned_Area_SQM', 'sum'),
+                       Total_Occupancy=('Max_Occupancy', 'sum')))
+        return totals.reindex(self.floors, fill_value=0)
+
+    @cached_property
+    def floor_units(self):
+        """Blocks per floor, whatever their category."""
+        return self.detailed['Floor'].value_counts().reindex(self.floors, fill_value=0)
+
+    @cached_property
+    def category_counts(self):
+        """Floor x category unit counts (every floor and category present, zeros included)."""
+        counts = pd.crosstab(self.detailed['Floor'], self.detailed['SpaceMix'])
+        return counts.reindex(index=self.floors, columns=self.categories, fill_value=0)
+
+    @cached_property
+    def type_counts(self):
+        """Block type x floor unit counts of the typical block types."""
+        names = self.typical_names
+        typical = self.detailed[self.detailed['Block_Name'].isin(names.index)]
+        return pd.crosstab(typical['Block_Name'], typical['Floor'])
+
+    @cached_property
+    def typical_names(self):
+        """Instances of every typical block type in the program."""
+        if self.typical_blocks is None:
+            return pd.Series(dtype=int)
+        return self.typical_blocks['Block_Name'].dropna().astype(str).str.strip().value_counts()
+
+    # -- report tables -----------------------------------------------------------
+
+    @cached_property
+    def floor_summary(self):
+        summary = self.floor_totals.rename_axis('Floor').reset_index()
+        if self.floor_input is None:
+            return summary
+        return self.floor_input.merge(summary, on='Floor', how='left').fillna(
+            {'Assgn_Blocks': 0, 'Assgn_Area_SQM': 0, 'Total_Occupancy': 0})
+
+    @cached_property
+    def space_mix(self):
+        counts = self.category_counts
+        floor_units = self.floor_units
+        overall_units = counts.sum(axis=0)
+        pct_floor = counts.div(floor_units.where(floor_units > 0), axis=0).mul(100).round(2).fillna(0.0)
+        pct_overall = counts.div(overall_units.where(overall_units > 0), axis=1).mul(100).round(2).fillna(0.0)
+        table = pd.DataFrame({
+            'Unit_Count_on_Floor': counts.stack(),
+            'Pct_of_Floor_UC': pct_floor.stack(),
+            'Pct_of_Overall_UC': pct_overall.stack(),
+        })
+        table.index.names = ['Floor', 'SpaceMix']
+        return table.reset_index()
+
+    @cached_property
+    def typical_summary(self):
+        df = self.type_counts
+        if df.empty:
+            return pd.DataFrame()
+        df = df.copy()
+        df['Total_Assigned'] = df.sum(axis=1)
+        totals = self.typical_names.reindex(df.index)
+        df['Assignment_Ratio'] = (df['Total_Assigned'] / totals.where(totals > 0)).round(3).fillna(0)
+        return df
@@ -0,0 +1,104 @@
+import re
+
+import pandas as pd
+
+# ----------------------------------------
+# Schema mapping: workbook columns -> canonical names
+# ----------------------------------------
+#
+# Every case workbook spells its columns a little differently
+# ('Usable_Area', 'Usable Area', 'Usable_Area_(SQM)', 'Cumulative_Block_Circulation_Area',
+# 'Cumulative_Block_Circulation_Area_(SQM)', 'Department_Sub-Department', ...).
+# DR.py normalised the floor sheet with floor_col_map; the same idea is applied
+# here to every sheet.  A column matches a canonical name when its key
+# (lower case, no spaces, '_', '-', '(' or ')') contains all tokens of one of
+# the canonical name's alternatives and none of its '!' tokens.  Rules are
+# tried in order and every canonical name is given to at most one column.
+# The workbooks carry several candidates for some names; the rules prefer
+# the columns the case scripts stack on: Cumulative_Block_Circulation_Area
+# over Cumulative Block Area_(SQM) (and never an SQFT column as Area_SQM),
+# Max_Occupancy_with_Capacity over Max_Occupancy_by_Block, and a Level
+# column over 'Department Name_Level1'.
+
+FLOOR_SCHEMA = [
+    ('Name', [('name',), ('floor',)]),
+    ('Usable_Area', [('usable', 'area')]),
+    ('Max_Capacity', [('capacity',), ('loading',)]),
+]
+FLOOR_POSITIONS = {'Name': 0, 'Usable_Area': 1, 'Max_Capacity': 2}
+
+BLOCK_SCHEMA = [
+    ('Block_ID', [('blockid',)]),
+    ('Block_Name', [('blockname',)]),
+    ('Department_Sub_Department', [('department', 'sub'), ('department', '!level')]),
+    ('Destination_Group', [('destinationgroup',)]),
+    ('Typical_Destination', [('typicaldestination',)]),
+    ('SpaceMix', [('spacemix',)]),
+    ('Area_SQM', [('circulation', 'area', '!sqft'), ('cumulative', 'area', '!sqft'), ('area', '!sqft')]),
+    ('Max_Occupancy', [('occupancy', 'capacity'), ('occupancy',), ('capacity',)]),
+    ('Asset_Type', [('immovable',), ('asset',)]),
+    ('Level', [('level', '!department')]),
+]
+
+DEPARTMENT_SPLIT_SCHEMA = [
+    ('Department_Sub_Department', [('department', 'sub'), ('department', '!level')]),
+    ('Splittable', [('splittable',), ('split',)]),
+    ('Min_Pct', [('min',)]),
+]
+DEPARTMENT_SPLIT_POSITIONS = {'Department_Sub_Department': 0, 'Splittable': 1, 'Min_Pct': 2}
+
+NUMERIC_COLUMNS = ['Usable_Area', 'Max_Capacity', 'Area_SQM', 'Max_Occupancy']
+TEXT_COLUMNS = ['Name', 'Block_Name', 'Department_Sub_Department', 'Destination_Group',
+                'Typical_Destination', 'SpaceMix', 'Asset_Type', 'Level']
+
+
+def column_key(column):
+    """Spelling-insensitive key of a column name."""
+    return re.sub(r'[\s_\-()]', '', str(column)).lower()
+
+
+def _matches(key, tokens):
+    return all(token[1:] not in key if token.startswith('!') else token in key for token in tokens)
+
+
+def column_map(columns, schema, positions=None):
+    """
+    {workbook column: canonical name} for the columns that match a rule.
+    Canonical names left unmatched fall back to a column position when
+    positions gives one (the AAR1/BR1 notebooks renamed floor columns by position).
+    """
+    mapping = {}
+    taken = set()
+    keys = {c: column_key(c) for c in columns}
+    for canonical, alternatives in schema:
+        for tokens in alternatives:
+            match = next((c for c in columns if c not in mapping and _matches(keys[c], tokens)), None)
+            if match is not None:
+                mapping[match] = canonical
+                taken.add(canonical)
+                break
+    for canonical, pos in (positions or {}).items():
+        if canonical not in taken and pos < len(columns) and columns[pos] not in mapping:
+            mapping[columns[pos]] = canonical
+    return mapping
+
+
+def normalize_columns(df, schema, positions=None, required=()):
+    """
+    Renames df's columns to the canonical names of schema, strips text
+    columns and coerces numeric ones (invalid values become 0).
+    Raises ValueError naming any required canonical column that is missing.
+    """
+    df = df.copy()
+    df.columns = [str(c).strip() for c in df.columns]
+    df = df.rename(columns=column_map(list(df.columns), schema, positions))
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns {missing}; found {list(df.columns)}")
+    for c in NUMERIC_COLUMNS:
+        if c in df.columns:
+            df[c] = pd.to_numeric(df[c], errors='coerce').fillna(0)
+    for c in TEXT_COLUMNS:
+        if c in df.columns:
+            df[c] = df[c].where(df[c].isna(), df[c].astype(str).str.strip())
+    return df
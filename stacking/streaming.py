@@ -0,0 +1,310 @@
+import csv
+import os
+import warnings
+from collections import Counter
+
+import pandas as pd
+
+from .block_types import block_types
+from .cases import MODES, PRIORITY_CATEGORIES
+from .floors import match_level
+from .inputs import normalize_blocks
+from .outputs import DETAILED_COLUMNS, UNASSIGNED_COLUMNS, _block_row
+from .phases import _allowed_whole, category_order, floor_targets
+from .plan import SPACE_MIX_CATEGORIES, can_place, fits, floors_for, new_plan, place, unknown_destination
+from .rejections import diagnose, reason_names
+from .reports import PlanReports
+
+# ----------------------------------------
+# Streaming mode: constant-memory stacking of very large block tables
+# ----------------------------------------
+#
+# stream_stack() never holds the block table or a detailed table.  Blocks are
+# read in chunks from CSV or Parquet, twice:
+#
+#   pass 1  places immovable blocks and totals every destination group and
+#           every typical block type
+#   (then)  destination groups get their floors from those totals and every
+#           typical block type gets per-floor targets, category by category
+#   pass 2  places destination and typical blocks chunk by chunk; blocks of
+#           an unknown Typical_Destination go straight to unassigned
+#
+# Every chunk is placed for all requested plans at once.  After each chunk
+# the placed and unassigned blocks of every plan are appended to that plan's
+# CSV files and dropped; only per-floor aggregates stay in memory.
+# The physical, department_split and retry_unassigned phases need whole block lists
+# and are not run here; keep-together and adjacency rules still apply
+# through can_place().  Unassigned blocks are diagnosed (rejections.py)
+# against the floors as they stand when their chunk is written out.
+
+
+def read_blocks(path, chunksize=100_000):
+    """Yields normalised block chunks of a CSV or Parquet file."""
+    if path.endswith(('.parquet', '.pq')):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet block tables needs pyarrow (pip install pyarrow)")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield normalize_blocks(batch.to_pandas())
+    else:
+        for chunk in pd.read_csv(path, chunksize=chunksize):
+            yield normalize_blocks(chunk)
+
+
+def _survey(chunk, config, groups, types):
+    """Adds a chunk's destination-group and typical-type totals to groups and types."""
+    movable = chunk[chunk['Asset_Type'] != 'Immovable Asset']
+    dest = movable[movable['Typical_Destination'].isin(config['destination_values'])]
+    for grp, rows in dest.groupby('Destination_Group'):
+        total = groups.setdefault(grp, [0.0, 0.0, set()])
+        total[0] += rows['Area_SQM'].sum()
+        total[1] += rows['Max_Occupancy'].sum()
+        total[2].update(zip(rows['Department_Sub_Department'], rows['Typical_Destination']))
+    typical = movable[movable['Typical_Destination'] == 'Typical']
+    stats = typical.groupby(['SpaceMix', 'Block_Name'])['Area_SQM'].agg(['count', 'sum'])
+    for key, row in stats.iterrows():
+        total = types.setdefault(key, [0, 0.0])
+        total[0] += int(row['count'])
+        total[1] += row['sum']
+
+
+class _PlanStream:
+    """Spill files and running aggregates of one streamed plan."""
+
+    def __init__(self, plan, out_dir):
+        self.plan = plan
+        name = f"{plan['mode']}_{plan['priority_category']}"
+        self.detailed_path = os.path.join(out_dir, f'{name}_detailed.csv')
+        self.unassigned_path = os.path.join(out_dir, f'{name}_unassigned.csv')
+        self._files = [open(self.detailed_path, 'w', newline=''), open(self.unassigned_path, 'w', newline='')]
+        self.detailed = csv.DictWriter(self._files[0], DETAILED_COLUMNS)
+        self.unassigned = csv.DictWriter(self._files[1], UNASSIGNED_COLUMNS)
+        self.detailed.writeheader()
+        self.unassigned.writeheader()
+        self.floor_totals = {fl: [0, 0.0, 0.0] for fl in plan['floors']}
+        self.category_counts = Counter()
+        self.type_counts = Counter()
+        self.unassigned_count = 0
+        self.group_floor = {}
+        self.targets = {}
+
+    def drain(self):
+        """Writes out and forgets everything placed or rejected since the last drain."""
+        for fl, info in self.plan['assignments'].items():
+            blocks = info['assigned_blocks']
+            if not blocks:
+                continue
+            totals = self.floor_totals[fl]
+            for blk in blocks:
+                self.detailed.writerow(dict(_block_row(blk), Floor=fl, Assigned_Area_SQM=blk['Area_SQM']))
+                totals[0] += 1
+                totals[1] += blk['Area_SQM']
+                totals[2] += blk['Max_Occupancy']
+                self.category_counts[fl, blk['SpaceMix']] += 1
+                self.type_counts[blk['Block_Name'], fl] += 1
+            blocks.clear()
+        for template, instances in block_types(self.plan['unassigned']):
+            immovable = template.get('Asset_Type') == 'Immovable Asset'
+            for group in ([[blk] for blk in instances] if immovable else [instances]):
+                reasons, nearest, _, _ = diagnose(self.plan, group[0])
+                columns = {'Reasons': reason_names(reasons), 'Nearest_Floor': nearest or ''}
+                for blk in group:
+                    self.unassigned.writerow(dict(_block_row(blk), Area_SQM=blk['Area_SQM'], **columns))
+        self.unassigned_count += len(self.plan['unassigned'])
+        self.plan['unassigned'] = []
+
+    def close(self):
+        for f in self._files:
+            f.close()
+
+    def reports(self, typical_names):
+        floors = self.plan['floors']
+        floor_totals = pd.DataFrame.from_dict(
+            self.floor_totals, orient='index',
+            columns=['Assgn_Blocks', 'Assgn_Area_SQM', 'Total_Occupancy']).reindex(floors)
+        category_counts = pd.DataFrame(
+            [[self.category_counts[fl, c] for c in SPACE_MIX_CATEGORIES] for fl in floors],
+            index=floors, columns=SPACE_MIX_CATEGORIES)
+        type_counts = pd.Series({key: n for key, n in self.type_counts.items() if key[0] in typical_names},
+                                dtype=int)
+        if type_counts.empty:
+            type_counts = pd.DataFrame()
+        else:
+            type_counts = type_counts.unstack(fill_value=0)
+            type_counts = type_counts[[fl for fl in floors if fl in type_counts.columns]]
+            type_counts.index.name, type_counts.columns.name = 'Block_Name', 'Floor'
+        program = self.plan['program']
+        floor_input = program['floors'][['Name', 'Usable_Area', 'Max_Capacity']].rename(columns={
+            'Name': 'Floor', 'Usable_Area': 'Input_Usable_Area', 'Max_Capacity': 'Input_Max_Capacity'})
+        return PlanReports.from_aggregates(
+            floors, floor_input,
+            floor_totals=floor_totals,
+            floor_units=floor_totals['Assgn_Blocks'],
+            category_counts=category_counts,
+            type_counts=type_counts,
+            typical_names=pd.Series(typical_names, dtype=int))
+
+
+def _plan_destinations(stream, groups):
+    """
+    Picks a whole-group floor for every destination group that fits one, as
+    place_destination_groups() does: the mode's destination floors first,
+    and only floors every (department, Typical_Destination) of the group is
+    allowed on.  Reserves the floor's space and registers the departments.
+    """
+    plan = stream.plan
+    names = list(groups)
+    if plan['config']['shuffle_groups']:
+        plan['rng'].shuffle(names)
+    floors = plan['floors']
+    dept_bit = plan['program']['dept_bit']
+    for grp in names:
+        area, cap, members = groups[grp]
+        members = [{'Department_Sub_Department': dept, 'Typical_Destination': kind} for dept, kind in members]
+        fl = next((f for f in floors[:plan['max_dest_floors']] + floors[plan['max_dest_floors']:]
+                   if fits(plan, f, area, cap) and all(_allowed_whole(plan, m, f) for m in members)), None)
+        if fl is not None:
+            plan['assignments'][fl]['remaining_area'] -= area
+            plan['assignments'][fl]['remaining_capacity'] -= cap
+            for m in members:
+                dept = m['Department_Sub_Department']
+                plan['dept_floors'].setdefault(dept, set()).add(fl)
+                plan['floor_dept_bits'][fl] = plan['floor_dept_bits'].get(fl, 0) | dept_bit.get(dept, 0)
+            stream.group_floor[grp] = fl
+
+
+def _plan_typical_targets(stream, types):
+    """
+    Per-floor targets of every typical block type, in priority category order.
+    Each category is spread over the area the earlier categories' targets leave.
+    """
+    plan = stream.plan
+    floors = plan['floors']
+    avail = {fl: plan['assignments'][fl]['remaining_area'] for fl in floors}
+    for cat in category_order(plan['priority_category']):
+        cat_types = [(key, total) for key, total in types.items() if key[0] == cat]
+        if sum(avail.values()) <= 0:
+            for key, _ in cat_types:
+                stream.targets[key] = {fl: 0 for fl in floors}
+            continue
+        planned = {fl: 0.0 for fl in floors}
+        for key, (count, area) in cat_types:
+            targ = floor_targets(count, avail, floors)
+            stream.targets[key] = targ
+            for fl in floors:
+                planned[fl] += max(targ[fl], 0) * area / count
+        avail = {fl: max(avail[fl] - planned[fl], 0.0) for fl in floors}
+
+
+def _place_streamed(stream, blk, fill):
+    """Places one destination or typical block of pass 2."""
+    plan = stream.plan
+    grp = blk['Destination_Group']
+    if blk['Typical_Destination'] in plan['config']['destination_values']:
+        fl = stream.group_floor.get(grp)
+        if fl is not None:
+            # release this block's share of the group's reservation, then place it
+            plan['assignments'][fl]['remaining_area'] += blk['Area_SQM']
+            plan['assignments'][fl]['remaining_capacity'] += blk['Max_Occupancy']
+            if not can_place(plan, blk, fl):
+                fl = None
+        if fl is None:
+            fl = next((f for f in floors_for(plan, blk) if can_place(plan, blk, f)), None)
+    elif fill:
+        fl = next((f for f in floors_for(plan, blk) if can_place(plan, blk, f)), None)
+    else:
+        targ = stream.targets.get((blk['SpaceMix'], blk['Block_Name']), {})
+        fl = next((f for f in plan['floors'] if targ.get(f, 0) > 0), None)
+        if fl is not None:
+            targ[fl] -= 1
+            if not can_place(plan, blk, fl):
+                fl = None
+    if fl is None:
+        plan['unassigned'].append(blk)
+    else:
+        place(plan, fl, blk)
+
+
+def stream_stack(program, block_source, out_dir, modes=None, categories=None, seed=None):
+    """
+    Streams blocks through every mode x category plan in constant memory.
+
+    program        program dict for floors, department rules and adjacency
+                   (its 'blocks' table is ignored and may be empty)
+    block_source   path of a CSV or Parquet block table, or a callable that
+                   returns a fresh iterator of block DataFrames (called twice)
+    out_dir        every plan writes <mode>_<category>_detailed.csv and
+                   <mode>_<category>_unassigned.csv here
+
+    Returns all_plans[mode][category] = {'detailed_path', 'unassigned_path',
+    'unassigned_count', 'reports'} where reports is a PlanReports.
+    """
+    if isinstance(block_source, str):
+        path = block_source
+
+        def block_source():
+            return read_blocks(path)
+
+    config = program['config']
+    fill = 'typical_fill' in config['phases']
+    skipped = [name for name in ('physical', 'department_split', 'retry_unassigned') if name in config['phases']]
+    if skipped:
+        warnings.warn(f"{' / '.join(skipped)} need whole block lists and are skipped when streaming")
+    os.makedirs(out_dir, exist_ok=True)
+
+    streams = []
+    for mode in modes or MODES:
+        for category in categories or PRIORITY_CATEGORIES:
+            plan = new_plan(program, mode, category, seed)
+            plan['pending_typical'] = []
+            plan['unassigned'] = []
+            streams.append(_PlanStream(plan, out_dir))
+
+    # pass 1: immovable blocks and totals
+    registry = program['floor_registry']
+    groups, types = {}, {}
+    for chunk in block_source():
+        immovable = chunk[chunk['Asset_Type'] == 'Immovable Asset'].to_dict('records')
+        for stream in streams:
+            plan = stream.plan
+            for blk in immovable:
+                fl = match_level(registry, blk['Level'])
+                if fl and fits(plan, fl, blk['Area_SQM'], blk['Max_Occupancy']):
+                    place(plan, fl, blk)
+                else:
+                    plan['unassigned'].append(blk)
+        _survey(chunk, config, groups, types)
+        for stream in streams:
+            stream.drain()
+
+    typical_names = Counter()
+    for (_, name), (count, _) in types.items():
+        typical_names[name] += count
+    for stream in streams:
+        _plan_destinations(stream, groups)
+        if not fill:
+            _plan_typical_targets(stream, types)
+
+    # pass 2: destination and typical blocks
+    for chunk in block_source():
+        unknown = unknown_destination(chunk, config)
+        movable = chunk[(chunk['Asset_Type'] != 'Immovable Asset') & ~unknown].to_dict('records')
+        unknown = chunk[unknown].to_dict('records')
+        for stream in streams:
+            stream.plan['unassigned'].extend(unknown)
+            for blk in movable:
+                _place_streamed(stream, blk, fill)
+            stream.drain()
+
+    all_plans = {}
+    for stream in streams:
+        stream.close()
+        plan = stream.plan
+        all_plans.setdefault(plan['mode'], {})[plan['priority_category']] = {
+            'detailed_path': stream.detailed_path,
+            'unassigned_path': stream.unassigned_path,
+            'unassigned_count': stream.unassigned_count,
+            'reports': stream.reports(typical_names),
+        }
+    return all_plans
@@ -0,0 +1,60 @@
+import math
+
+# ----------------------------------------
+# Subset-sum over block areas
+# ----------------------------------------
+#
+# Block areas are rounded up to whole units of `resolution` square metres so
+# the reachable sums of a set of blocks fit in one Python int used as a
+# bitset.  A chosen sum never overfills a floor because every block is
+# rounded up.
+
+
+def subset_sums(units):
+    """
+    Bitset of the reachable sums of the integer sizes in units, and for every
+    reachable sum the index of the last item used to reach it first.
+    """
+    parent = [-1] * (sum(units) + 1)
+    reach = 1
+    for i, u in enumerate(units):
+        new = (reach << u) & ~reach
+        reach |= new
+        while new:
+            low = new & -new
+            parent[low.bit_length() - 1] = i
+            new ^= low
+    return reach, parent
+
+
+def area_units(areas, resolution=1.0):
+    return [max(1, math.ceil(a / resolution)) for a in areas]
+
+
+def largest_subset(areas, area_limit, accept=None, resolution=1.0, max_tries=64):
+    """
+    Indices of the subset of areas with the largest total not above
+    area_limit for which accept(indices) is true (any subset if accept is None).
+    Candidate totals are tried from the largest down, at most max_tries of
+    them.  accept may return None to stop the search early.  Returns None
+    if no subset is accepted.
+    """
+    units = area_units(areas, resolution)
+    reach, parent = subset_sums(units)
+    tries = 0
+    for s in range(min(int(area_limit // resolution), len(parent) - 1), 0, -1):
+        if not reach >> s & 1:
+            continue
+        piece = []
+        while s:
+            piece.append(parent[s])
+            s -= units[parent[s]]
+        verdict = True if accept is None else accept(piece)
+        if verdict is None:
+            return None
+        if verdict:
+            return piece
+        tries += 1
+        if tries >= max_tries:
+            return None
+    return None
@@ -0,0 +1,28 @@
+import random
+
+import numpy as np
+
+from Zoning.block_grid import FreeWindowIndex, place_blocks
+
+
+def test_random_free_draws_only_free_windows_as_blocks_are_placed():
+    rng = random.Random(3)
+    occupied = np.array([[rng.random() < 0.1 for _ in range(40)] for _ in range(30)])
+    index = FreeWindowIndex(occupied, 3, 2)
+    reference = FreeWindowIndex(occupied, 3, 2)
+    while True:
+        origin = index.random_free(rng)
+        if origin is None:
+            break
+        assert reference.is_free(*origin)
+        index.place(*origin)
+        reference.place(*origin)
+        assert sorted(index._pool[:index._size].tolist()) == np.flatnonzero(reference.free).tolist()
+    assert not reference.free.any()
+
+
+def test_shuffled_blocks_do_not_overlap():
+    grid = [[' '] * 12 for _ in range(12)]
+    origins = place_blocks(grid, 'B', (2, 3), 20, shuffle=True, rng=random.Random(5))
+    assert len(origins) > 1
+    assert sum(row.count('B') for row in grid) == 6 * len(origins)
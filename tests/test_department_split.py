@@ -0,0 +1,28 @@
+import pytest
+
+from stacking.department_split import allocate_departments, min_share
+
+
+@pytest.mark.parametrize('pct, share', [(0.25, 0.25), (1, 1.0), (25, 0.25), (100, 1.0),
+                                        (None, 1.0), ('', 1.0), (-0.5, 0.0)])
+def test_min_share_reads_fractions_and_percentages(pct, share):
+    assert min_share({'A': pct}, 'A') == pytest.approx(share)
+
+
+def test_min_share_of_a_missing_department_keeps_it_whole():
+    assert min_share({}, 'A') == 1.0
+
+
+def test_allocate_departments_honours_the_minimum_fraction():
+    blocks = [{'Area_SQM': 10.0, 'Max_Occupancy': 1} for _ in range(8)]
+    floors = [('F1', 50.0, 10), ('F2', 50.0, 10)]
+    placed = []
+    unplaced = allocate_departments({'A': blocks}, lambda dept: floors, {'A': 0}, {'A': 0.25},
+                                    lambda fl, blk: placed.append(fl))
+    assert not unplaced
+    assert sorted(placed.count(fl) for fl in ('F1', 'F2')) == [3, 5]
+
+    # a minimum of 0.7 leaves no split with both pieces at or above 70 % of the area
+    unplaced = allocate_departments({'A': blocks}, lambda dept: floors, {'A': 0}, {'A': 0.7},
+                                    lambda fl, blk: None)
+    assert len(unplaced) == 8
@@ -0,0 +1,88 @@
+import os
+
+import pandas as pd
+import pytest
+
+from stacking import CASES, MODES, build_program, case_config, load_program, rejection_summary, run_stack_plan, stack
+from stacking.rejections import reason_names
+
+BR1 = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'BR1', 'BR-1.xlsx')
+
+FLOORS = pd.DataFrame({
+    'Name': ['L001Ground Floor', 'L002Floor 01', 'L003Floor 02', 'L004Floor 03'],
+    'Usable_Area': [400, 300, 300, 250],
+    'Max_Assignable_Floor_loading_Capacity': [60, 50, 50, 40],
+})
+
+
+def block(block_id, name, dept, kind, area, group='', asset='Movable Asset', level='', mix='WE'):
+    return {'Block_ID': block_id, 'Block_Name': name, 'Department_Sub_Department': dept,
+            'Destination_Group': group, 'Typical_Destination': kind,
+            'SpaceMix_(ME_WE_US_Support_Speciality)': mix, 'Cumulative_Block_Circulation_Area': area,
+            'Max_Occupancy_with_Capacity': 1, 'Immovable-Movable Asset': asset, 'Level': level}
+
+
+def program_blocks():
+    rows = [block(f'T{k}', ['Desk', 'Office', 'Meeting'][k % 3], f'BU{k % 2}_Dept{k % 3}', 'Typical',
+                  [6.0, 12.0, 20.0][k % 3], mix=['WE', 'WE', 'ME'][k % 3]) for k in range(90)]
+    rows += [block(f'D{k}', f'Cafe {k}', 'BU0_Dept0', 'Destination', 30.0, group=f'G{k % 3}', mix='US')
+             for k in range(9)]
+    rows += [
+        block('R1', 'Reception', 'BU0_Dept0', 'Destination', 25.0, group='G0', mix='Support'),
+        block('E1', 'CEO Office', 'BU1_Dept1', 'Typical', 18.0),
+        block('I1', 'Plant Room', 'BU0_Dept0', 'Typical', 40.0, asset='Immovable Asset', level='Floor 01'),
+        block('I2', 'Riser', 'BU0_Dept0', 'Typical', 10.0, asset='Immovable Asset', level='Floor 09'),
+        block('U1', 'Archive', 'BU1_Dept2', 'Storage', 15.0),
+        block('X1', 'Oversized Hall', 'BU1_Dept2', 'Typical', 5000.0),
+    ]
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('case', sorted(CASES))
+@pytest.mark.parametrize('mode', MODES)
+def test_every_block_is_in_exactly_one_output(case, mode):
+    blocks = program_blocks()
+    program = build_program(FLOORS, blocks, config=case_config(case))
+    detailed, _, _, unassigned = run_stack_plan(program, mode, 'ME', seed=1)
+    out = list(detailed['Block_ID']) + list(unassigned['Block_ID'])
+    assert sorted(out) == sorted(blocks['Block_ID'])
+
+
+@pytest.mark.parametrize('case', ['New_AR', 'New_BR'])
+def test_new_build_cases_place_physical_constraint_blocks(case):
+    program = build_program(FLOORS, program_blocks(), config=case_config(case))
+    detailed = run_stack_plan(program, 'centralized', 'ME', seed=1)[0].set_index('Block_ID')
+    assert detailed.loc['R1', 'Floor'] == 'L001Ground Floor'
+    assert detailed.loc['E1', 'Floor'] == 'L004Floor 03'
+    assert detailed.loc['I1', 'Floor'] == 'L002Floor 01'
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_br1_keeps_departments_together_without_split_rule_losses(mode):
+    pytest.importorskip('openpyxl')
+    plan = stack(load_program(BR1, case_config('BR')), mode, 'ME', 1)
+    reasons = rejection_summary(plan).set_index('Reason')['Blocks']
+    assert len(plan['unassigned']) == 57  # capacity-bound; the split rule used to leave 667
+    assert reasons.get('split rule', 0) == 0
+
+
+@pytest.mark.parametrize('case', sorted(CASES))
+def test_every_unassigned_block_has_the_reason_its_phase_recorded(case):
+    plan = stack(build_program(FLOORS, program_blocks(), config=case_config(case)), 'centralized', 'ME', 1)
+    reasons = {blk['Block_ID']: reason_names(plan['rejections']['reasons'][blk['Block_Index']])
+               for blk in plan['unassigned']}
+    assert all(reasons.values())
+    assert reasons['I2'] == 'level'
+    assert reasons['U1'] == 'unknown destination'
+    assert 'area' in reasons['X1']
+
+
+def test_department_split_rejections_name_the_split_rule():
+    floors = FLOORS.assign(Usable_Area=30)
+    blocks = pd.DataFrame([block(f'K{k}', 'Desk', 'BU0_Keep', 'Typical', 5.0) for k in range(10)])
+    split = pd.DataFrame({'Department_Sub-Department': ['BU0_Keep'], 'Splittable': [1],
+                          'Min_%_of_Block_per_department': [1]})
+    program = build_program(floors, blocks, split, config=case_config('AAR'))
+    plan = stack(program, 'centralized', 'ME', 1, phases=['department_split'])
+    assert len(plan['unassigned']) == 10
+    assert rejection_summary(plan).set_index('Reason').loc['split rule', 'Blocks'] == 10
@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+from stacking import case_config, load_program
+from stacking.inputs import with_header_row
+from stacking.schema import BLOCK_SCHEMA, column_map
+
+pytest.importorskip('openpyxl')
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+AR1 = os.path.join(ROOT, 'AR1', 'AR--1.xlsx')
+BR1 = os.path.join(ROOT, 'BR1', 'BR-1.xlsx')
+
+
+def resolved(path):
+    columns = pd.read_excel(path, sheet_name='Program Table Input 1 - Block', nrows=0).columns
+    return {canonical: column for column, canonical in
+            column_map([str(c).strip() for c in columns], BLOCK_SCHEMA).items()}
+
+
+@pytest.mark.parametrize('path', [AR1, BR1])
+def test_block_columns_resolve_to_the_stacked_columns(path):
+    columns = resolved(path)
+    assert columns['Area_SQM'] == 'Cumulative_Block_Circulation_Area'
+    assert columns['Max_Occupancy'] == 'Max_Occupancy_with_Capacity'
+    assert columns['Department_Sub_Department'] == 'Department_Sub_Department'
+    assert 'Level' not in columns  # 'Department Name_Level1' is not a floor level
+
+
+def test_sqft_column_is_never_area_sqm():
+    columns = ['Cumulative_Block_Area (SQFT)', 'Block_Area']
+    assert column_map(columns, BLOCK_SCHEMA)['Block_Area'] == 'Area_SQM'
+
+
+def test_block_totals_of_ar1():
+    blocks = load_program(AR1, case_config('AR'))['blocks']
+    assert len(blocks) == 2404
+    assert blocks['Area_SQM'].sum() == pytest.approx(18347.06, abs=0.01)
+    assert blocks['Max_Occupancy'].sum() == pytest.approx(1918.25)
+
+
+@pytest.mark.parametrize('path, departments', [(AR1, 2), (BR1, 48)])
+def test_department_split_keeps_its_first_department(path, departments):
+    program = load_program(path, case_config('AR'))
+    first = pd.read_excel(path, sheet_name='Department Split').iloc[0]
+    assert len(program['dept_splittable']) == departments
+    assert program['dept_splittable'][first.iloc[0].strip()] == first['Splittable']
+
+
+def test_department_split_header_below_a_title_row():
+    raw = pd.DataFrame([['Department Split', None, None],
+                        ['Department_Sub-Department', 'Splittable', 'Min_%_of_Block'],
+                        ['A_A', 1, 0.5]])
+    table = with_header_row(raw, 'splittable')
+    assert list(table.columns) == ['Department_Sub-Department', 'Splittable', 'Min_%_of_Block']
+    assert table['Splittable'].tolist() == [1]
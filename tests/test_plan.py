@@ -0,0 +1,44 @@
+import random
+
+import pandas as pd
+import pytest
+
+from stacking import build_program, case_config
+from stacking.plan import allowed, feasibility_mask, new_plan, place
+
+FLOORS = pd.DataFrame({
+    'Name': [f'L00{k}Floor 0{k}' for k in range(1, 6)],
+    'Usable_Area': [1000] * 5,
+    'Max_Capacity': [100] * 5,
+})
+DEPTS = [f'BU{k % 2}_Dept{k}' for k in range(6)]
+
+
+def program():
+    blocks = pd.DataFrame([{'Block_ID': f'T{k}', 'Block_Name': 'Desk', 'Department_Sub_Department': DEPTS[k % 6],
+                            'Typical_Destination': 'Typical', 'SpaceMix': 'WE', 'Area_SQM': 5.0,
+                            'Max_Occupancy': 1} for k in range(60)])
+    adjacency = pd.DataFrame(0, index=DEPTS, columns=DEPTS)
+    for a, b in [(0, 1), (2, 5), (3, 3)]:
+        adjacency.iloc[a, b] = adjacency.iloc[b, a] = -1
+    split = pd.DataFrame({'Department_Sub-Department': DEPTS, 'Splittable': [1, 0, 1, 0.75, 1, -1],
+                          'Min_%_of_Block_per_department': [1, 0.25, 1, 0.25, 1, 1]})
+    return build_program(FLOORS, blocks, split, adjacency, config=case_config('AR'))
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_feasibility_mask_matches_the_scalar_check(seed):
+    plan = new_plan(program(), seed=seed)
+    rng = random.Random(seed)
+    blocks = plan['program']['blocks'].to_dict('records')
+    for blk in rng.sample(blocks, 25):
+        place(plan, rng.choice(plan['floors']), blk)
+        mask = feasibility_mask(plan, DEPTS)
+        for i, dept in enumerate(DEPTS):
+            probe = {'Department_Sub_Department': dept, 'Typical_Destination': 'Typical'}
+            assert list(mask[i]) == [allowed(plan, probe, fl) for fl in plan['floors']]
+
+
+def test_feasibility_mask_of_no_departments():
+    plan = new_plan(program())
+    assert feasibility_mask(plan, []).shape == (0, 5)
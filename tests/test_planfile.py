@@ -0,0 +1,17 @@
+import pytest
+
+from stacking import build_program, case_config, stack
+from stacking.planfile import diff_plans, save_plan
+
+from test_engine import FLOORS, program_blocks
+
+
+def test_diff_of_plans_of_different_program_versions_warns(tmp_path):
+    blocks = program_blocks()
+    program_a = build_program(FLOORS, blocks, config=case_config('AR'))
+    program_b = build_program(FLOORS, blocks.assign(Max_Occupancy_with_Capacity=2), config=case_config('AR'))
+    save_plan(str(tmp_path / 'a'), stack(program_a, seed=1))
+    save_plan(str(tmp_path / 'b'), stack(program_b, seed=1))
+    with pytest.warns(UserWarning, match='different program versions'):
+        diff = diff_plans(str(tmp_path / 'a'), str(tmp_path / 'b'))
+    assert set(diff) == {'moved', 'floors', 'adjacency'}